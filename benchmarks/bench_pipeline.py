@@ -0,0 +1,170 @@
+"""Time and memory of every stage of the report, on synthetic seasons (jelenlet.synthetic).
+
+    uv run python benchmarks/bench_pipeline.py                     # compare with benchmarks/baseline.json
+    uv run python benchmarks/bench_pipeline.py --scenario large
+    uv run python benchmarks/bench_pipeline.py --update-baseline   # after an intended change, on the reference machine
+
+Exits with 1 if a stage got slower, or its peak memory grew, by more than --tolerance compared to the baseline.
+The timings are the best of --repeat runs; peak memory is measured in a separate run with tracemalloc, as it
+slows down the code it measures.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from jelenlet.database import Database
+from jelenlet.excel_export import to_excel
+from jelenlet.fixer import fix_email_issues, fix_name_issues, fixed_name_emails
+from jelenlet.process import (
+    build_journal,
+    change_emails_in_dataframes,
+    change_names_in_dataframes,
+    construct_collective_dataframe,
+    read_dataframes,
+    sort_by_name,
+)
+from jelenlet.synthetic import Rates, generate_season
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+LEVEL = "kozep"
+
+# name -> members, rehearsals, rates
+SCENARIOS = {
+    "small": (100, 20, Rates(name_typos=0.01, gmail_typos=0.005, nan_emails=0.005)),
+    "medium": (500, 40, Rates(name_typos=0.01, gmail_typos=0.005, nan_emails=0.005)),
+    "large": (2000, 100, Rates(name_typos=0.01, gmail_typos=0.005, nan_emails=0.005)),
+}
+STAGES = ["read_dataframes", "build_journal", "fixers", "construct_collective_dataframe", "sort_by_name", "to_excel"]
+
+Measure = Callable[[str, Callable], object]
+
+
+def run_stages(folder: Path, db_file: Path, measure: Measure):
+    """The stages of process(), one by one, with the fixers not raising on the issues of the synthetic typos."""
+    db = Database(db_file, delete_db=True)
+    dfs, file_names = measure("read_dataframes", lambda: read_dataframes(folder, LEVEL, db.read_email_name_database()))
+    journal = measure("build_journal", lambda: build_journal(dfs))
+
+    def fixers():
+        email_name, name_issues = fix_name_issues(journal.email_names, db)
+        unresolved = {i.email for i in name_issues if i.suggestion is None}
+        name_emails = fixed_name_emails(journal.email_names, email_name, unresolved)
+        wrong_right_emails, email_names_full, _ = fix_email_issues(name_emails, email_name, db)
+        return email_name, wrong_right_emails, email_names_full
+
+    email_name, wrong_right_emails, email_names_full = measure("fixers", fixers)
+
+    def construct():
+        change_names_in_dataframes(email_name, dfs)
+        change_emails_in_dataframes(wrong_right_emails, dfs)
+        return construct_collective_dataframe(file_names, dfs, email_names_full, LEVEL)
+
+    df = measure("construct_collective_dataframe", construct)
+    measure("sort_by_name", lambda: sort_by_name(df))
+    measure("to_excel", lambda: to_excel(io.BytesIO(), df.reset_index()))
+
+
+def time_stages(folder: Path, db_file: Path) -> dict[str, float]:
+    seconds = {}
+
+    def measure(stage, fn):
+        start = time.perf_counter()
+        result = fn()
+        seconds[stage] = time.perf_counter() - start
+        return result
+
+    run_stages(folder, db_file, measure)
+    return seconds
+
+
+def peak_memory_of_stages(folder: Path, db_file: Path) -> dict[str, float]:
+    """MB allocated at the peak of each stage, above what was allocated before it."""
+    peaks = {}
+
+    def measure(stage, fn):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks[stage] = (peak - before) / 2**20
+        return result
+
+    tracemalloc.start()
+    try:
+        run_stages(folder, db_file, measure)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def bench(scenario: str, repeat: int) -> dict[str, dict[str, float]]:
+    members, rehearsals, rates = SCENARIOS[scenario]
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "xlsx"
+        generate_season(folder, members, rehearsals, LEVEL, rates)
+        with contextlib.redirect_stdout(io.StringIO()):  # the warnings and issues of the fixers
+            runs = [time_stages(folder, Path(tmp) / "db.ini") for _ in range(repeat)]
+            peaks = peak_memory_of_stages(folder, Path(tmp) / "db.ini")
+    return {stage: {"seconds": round(min(r[stage] for r in runs), 4), "peak_mb": round(peaks[stage], 2)} for stage in STAGES}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of `results` compared to `baseline`, both scenario -> stage -> metric -> value."""
+    regressions = []
+    for scenario, stages in results.items():
+        for stage, metrics in stages.items():
+            for metric, value in metrics.items():
+                base = baseline.get(scenario, {}).get(stage, {}).get(metric)
+                # small absolute slack: a few ms or a few hundred KB is noise
+                slack = 0.005 if metric == "seconds" else 0.25
+                if base is not None and value > base * (1 + tolerance) + slack:
+                    regressions.append(f"{scenario} / {stage}: {metric} {value} > baseline {base}")
+    return regressions
+
+
+def print_results(results: dict, baseline: dict):
+    for scenario, stages in results.items():
+        members, rehearsals, _ = SCENARIOS[scenario]
+        print(f"\n{scenario}: {members} members, {rehearsals} rehearsals")
+        print(f"{'stage':32} {'seconds':>9} {'baseline':>9} {'peak MB':>9} {'baseline':>9}")
+        for stage, m in stages.items():
+            base = baseline.get(scenario, {}).get(stage, {})
+            print(f"{stage:32} {m['seconds']:9.4f} {base.get('seconds', float('nan')):9.4f} "
+                  f"{m['peak_mb']:9.2f} {base.get('peak_mb', float('nan')):9.2f}")  # fmt: skip
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], nargs="+", default=["small", "medium"])
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per scenario, the best one counts")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative growth over the baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="save the results as the new baseline")
+    args = parser.parse_args()
+
+    scenarios = list(SCENARIOS) if "all" in args.scenario else args.scenario
+    results = {scenario: bench(scenario, args.repeat) for scenario in scenarios}
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    print_results(results, baseline)
+
+    if args.update_baseline:
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions:\n" + "\n".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
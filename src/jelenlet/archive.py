@@ -0,0 +1,285 @@
+"""Attendance of every season, per level, for queries across seasons without the xlsx files.
+
+data/archive/<level>.json: the email -> member index (row) and the rehearsal dates (bit) of the level
+data/archive/<level>.<generation>.bits: one bitset per member over the dates, rows of the same size,
+    memory mapped by the queries
+
+The archive is append-only: reports add members and dates, and set attendance bits, they never
+remove any. Every append writes a new bits file, then the json pointing to it, so an interrupted
+append leaves the previous archive intact. Appends to a level hold data/archive/<level>.lock.
+
+    jelenlet-archive query rates --szint kozep --since 2023.09.01 --min-rate 0.7
+"""
+
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from jelenlet.errors import ReportError
+from jelenlet.files import atomic_write
+from jelenlet.paths import ARCHIVE_DIR
+
+# Bump, when the layout of the files changes
+ARCHIVE_VERSION = 1
+ARCHIVE_LEVELS = ["kezdo", "kozep", "halado", "egyeb"]
+LOCK_TIMEOUT = 60  # seconds to wait for an other append of the level
+STALE_LOCK = 600  # seconds: a lock this old was left by a crashed run, appends take less than a second
+
+
+@dataclass
+class LevelArchive:
+    level: str
+    emails: list[str] = field(default_factory=list)  # row of the member -> email
+    names: list[str] = field(default_factory=list)  # name of the member in the newest season appended
+    name_dates: list[str] = field(default_factory=list)  # last date of the season the name is from
+    dates: list[str] = field(default_factory=list)  # bit -> "%Y.%m.%d", in order of arrival
+    bits: np.ndarray = field(default_factory=lambda: np.zeros((0, 0), dtype=np.uint8))  # members x ceil(dates / 8)
+    generation: int = 0
+
+    def __post_init__(self):
+        self.member = {email: row for row, email in enumerate(self.emails)}
+
+    def matrix(self) -> np.ndarray:
+        """Members x dates bool matrix, dates in order of arrival."""
+        return np.unpackbits(self.bits, axis=1, count=len(self.dates), bitorder="little").astype(bool)
+
+    def attendance(self, since: str | None = None, until: str | None = None) -> tuple[np.ndarray, list[str]]:
+        """Members x dates bool matrix of the dates in [since, until], in chronological order."""
+        order = [i for i in np.argsort(self.dates, kind="stable") if (since or "") <= self.dates[i] <= (until or "9999")]
+        return self.matrix()[:, order], [self.dates[i] for i in order]
+
+
+def json_file(level: str, folder: Path) -> Path:
+    return folder / f"{level}.json"
+
+
+def bits_file(level: str, generation: int, folder: Path) -> Path:
+    return folder / f"{level}.{generation}.bits"
+
+
+def load_archive(level: str, folder: Path = ARCHIVE_DIR) -> LevelArchive:
+    """The archive of `level`, with the bits memory mapped read-only. Empty if there is none yet."""
+    try:
+        meta = json.loads(json_file(level, folder).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return LevelArchive(level)
+    if meta.get("version") != ARCHIVE_VERSION:
+        raise ReportError(f"Unknown archive version in {json_file(level, folder)}: {meta.get('version')}")
+    shape = (len(meta["emails"]), (len(meta["dates"]) + 7) // 8)
+    if 0 in shape:
+        bits = np.zeros(shape, dtype=np.uint8)
+    else:
+        try:
+            bits = np.memmap(bits_file(level, meta["generation"], folder), dtype=np.uint8, mode="r", shape=shape)
+        except FileNotFoundError:  # an append replaced it since the json was read
+            return load_archive(level, folder)
+    name_dates = meta.get("name_dates", [""] * len(meta["emails"]))  # archives made before name_dates
+    return LevelArchive(level, meta["emails"], meta["names"], name_dates, meta["dates"], bits, meta["generation"])
+
+
+@contextmanager
+def _locked(lock_file: Path):
+    """Hold `lock_file`, so appends of other runs don't overwrite each other's generation."""
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        try:
+            os.close(os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock_file.stat().st_mtime > STALE_LOCK:
+                    print(f"[WARNING] Removing stale archive lock {lock_file}")
+                    lock_file.unlink(missing_ok=True)
+                    continue
+            except FileNotFoundError:  # released meanwhile
+                continue
+            if time.monotonic() > deadline:
+                raise ReportError(f"The archive is locked by an other run: {lock_file}. Delete it, if there is no such run.")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        lock_file.unlink(missing_ok=True)
+
+
+def append_season(df, level: str, folder: Path = ARCHIVE_DIR) -> LevelArchive:
+    """Add a result of construct_collective_dataframe (emails in the index or in an "Email" column) to the archive.
+
+    The date columns are the int8 ones. Adding the same season again changes nothing. The names of
+    the members are the ones of the newest season, so adding an older season keeps them.
+    """
+    if "Email" in df.columns:
+        df = df.set_index("Email")
+    folder.mkdir(parents=True, exist_ok=True)
+    with _locked(folder / f"{level}.lock"):
+        return _append_season(df, level, folder)
+
+
+def _append_season(df, level: str, folder: Path) -> LevelArchive:
+    date_columns = [c for c in df.columns if df[c].dtype == np.int8]
+    season_date = max(date_columns, default="")
+    old = load_archive(level, folder)
+
+    emails, names, name_dates, dates = list(old.emails), list(old.names), list(old.name_dates), list(old.dates)
+    member = dict(old.member)
+    for email, name in zip(df.index, df["Név"]):
+        if email not in member:
+            member[email] = len(emails)
+            emails.append(email)
+            names.append(name)
+            name_dates.append(season_date)
+        elif season_date >= name_dates[member[email]]:
+            names[member[email]] = name
+            name_dates[member[email]] = season_date
+    date_bit = {d: i for i, d in enumerate(dates)}
+    for d in date_columns:
+        if d not in date_bit:
+            date_bit[d] = len(dates)
+            dates.append(d)
+
+    matrix = np.zeros((len(emails), len(dates)), dtype=bool)
+    matrix[: len(old.emails), : len(old.dates)] = old.matrix()
+    rows = np.array([member[e] for e in df.index], dtype=np.intp)
+    for d in date_columns:
+        matrix[rows, date_bit[d]] |= df[d].to_numpy() == 1
+
+    bits = np.packbits(matrix, axis=1, bitorder="little")
+    new = LevelArchive(level, emails, names, name_dates, dates, bits, old.generation + 1)
+    with atomic_write(bits_file(level, new.generation, folder)) as f:
+        f.write(new.bits.tobytes())
+    meta = {
+        "version": ARCHIVE_VERSION,
+        "generation": new.generation,
+        "dates": dates,
+        "emails": emails,
+        "names": names,
+        "name_dates": name_dates,
+    }
+    with atomic_write(json_file(level, folder), mode="w") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    old.bits = new.bits  # close the memory map of the old file, Windows can't delete it otherwise
+    bits_file(level, old.generation, folder).unlink(missing_ok=True)
+    return new
+
+
+def longest_streaks(attended: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Longest and current (up to the last date) run of attended rehearsals, per member."""
+    current = np.zeros(attended.shape[0], dtype=np.int64)
+    longest = np.zeros(attended.shape[0], dtype=np.int64)
+    for column in attended.T:
+        current = (current + 1) * column
+        np.maximum(longest, current, out=longest)
+    return longest, current
+
+
+def query_rates(archive: LevelArchive, since=None, until=None, min_rate=0.0) -> list[tuple[str, str, int, int, float]]:
+    """(email, name, attended, rehearsals, rate) of the members with at least `min_rate`, the best first."""
+    attended, dates = archive.attendance(since, until)
+    counts = attended.sum(axis=1)
+    rates = counts / max(len(dates), 1)
+    rows = np.flatnonzero((rates >= min_rate) & (counts > 0))
+    rows = rows[np.argsort(-rates[rows], kind="stable")]
+    return [(archive.emails[r], archive.names[r], int(counts[r]), len(dates), float(rates[r])) for r in rows]
+
+
+def query_streaks(archive: LevelArchive, since=None, until=None, top=20) -> list[tuple[str, str, int, int]]:
+    """(email, name, longest streak, current streak) of the `top` members with the longest streaks."""
+    attended, _ = archive.attendance(since, until)
+    longest, current = longest_streaks(attended)
+    rows = np.argsort(-longest, kind="stable")[:top]
+    return [(archive.emails[r], archive.names[r], int(longest[r]), int(current[r])) for r in rows if longest[r] > 0]
+
+
+def query_overlap(archives: Sequence[LevelArchive], since=None, until=None) -> list[tuple[str, str, list[int]]]:
+    """(email, name, attended per level) of the members, who attended every level of `archives`."""
+    if not archives:
+        return []
+    attended_per_level = []
+    for archive in archives:
+        attended, _ = archive.attendance(since, until)
+        counts = attended.sum(axis=1)
+        attended_per_level.append({archive.emails[r]: int(counts[r]) for r in np.flatnonzero(counts)})
+    common = set.intersection(*(set(a) for a in attended_per_level))
+    first = archives[0]
+    return [(e, first.names[row], [a[e] for a in attended_per_level]) for row, e in enumerate(first.emails) if e in common]
+
+
+def query_member(archives: Sequence[LevelArchive], email: str, since=None, until=None) -> list[tuple[str, str, int, int, int]]:
+    """(level, name, attended, rehearsals, longest streak) of `email`, in every level it is in."""
+    result = []
+    for archive in archives:
+        if email not in archive.member:
+            continue
+        attended, dates = archive.attendance(since, until)
+        row = attended[archive.member[email] : archive.member[email] + 1]
+        longest, _ = longest_streaks(row)
+        result.append((archive.level, archive.names[archive.member[email]], int(row.sum()), len(dates), int(longest[0])))
+    return result
+
+
+def parse_date(value: str) -> str:
+    """'2023-09-01' or '2023.09.01' -> '2023.09.01', the format of the date columns"""
+    parts = value.replace("-", ".").strip(".").split(".")
+    if len(parts) != 3 or not all(p.isdigit() for p in parts):
+        raise argparse.ArgumentTypeError(f"Hibás dátum: {value}, pl.: 2023.09.01")
+    return f"{int(parts[0]):04d}.{int(parts[1]):02d}.{int(parts[2]):02d}"
+
+
+def parse_archive_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="jelenlet-archive", description="Az archivált összesítők lekérdezése, xlsx fájlok nélkül")
+    commands = parser.add_subparsers(dest="command", required=True)
+    query = commands.add_parser("query", help="Lekérdezés az archívumból")
+    query.add_argument(
+        "kind",
+        choices=["summary", "rates", "streaks", "overlap", "member"],
+        help="summary: szintek, tagok és próbák száma | rates: részvételi arány | streaks: leghosszabb sorozatok | "
+        + "overlap: több szinten is résztvevő tagok | member: egy tag adatai (--email)",
+    )
+    query.add_argument("--szint", nargs="+", choices=ARCHIVE_LEVELS, default=["kozep"], help="Szint(ek) (alapértelmezett: kozep)")
+    query.add_argument("--since", type=parse_date, help="Ettől a naptól, pl. 2023.09.01")
+    query.add_argument("--until", type=parse_date, help="Eddig a napig, pl. 2024.06.30")
+    query.add_argument("--min-rate", type=float, default=0.0, help="rates: legalább ekkora részvételi arány, pl. 0.7")
+    query.add_argument("--top", type=int, default=20, help="streaks: a legjobbak száma (alapértelmezett: 20)")
+    query.add_argument("--email", help="member: a tag email címe")
+    query.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR, help="Az archívum mappája (alapértelmezett: <projekt>/data/archive)")
+    args = parser.parse_args(argv)
+    if args.kind == "member" and not args.email:
+        query.error("A member lekérdezéshez meg kell adni az --email címet.")
+    return args
+
+
+def main(argv: Sequence[str] | None = None):
+    args = parse_archive_args(argv)
+    archives = [load_archive(level, args.archive_dir) for level in args.szint]
+    if args.kind == "summary":
+        for a in archives:
+            period = f" ({min(a.dates)} - {max(a.dates)})" if a.dates else ""
+            print(f"{a.level}: {len(a.emails)} members, {len(a.dates)} rehearsals{period}")
+    elif args.kind == "rates":
+        for a in archives:
+            print(f"===== {a.level} =====")
+            for email, name, attended, total, rate in query_rates(a, args.since, args.until, args.min_rate):
+                print(f"{rate:6.1%} {attended:4}/{total:<4} {name} <{email}>")
+    elif args.kind == "streaks":
+        for a in archives:
+            print(f"===== {a.level} ===== longest / current streak")
+            for email, name, longest, current in query_streaks(a, args.since, args.until, args.top):
+                print(f"{longest:4} {current:4} {name} <{email}>")
+    elif args.kind == "overlap":
+        print("Attended per level: " + ", ".join(args.szint))
+        for email, name, counts in query_overlap(archives, args.since, args.until):
+            print(f"{' '.join(f'{c:4}' for c in counts)} {name} <{email}>")
+    elif args.kind == "member":
+        for level, name, attended, total, longest in query_member(archives, args.email, args.since, args.until):
+            print(f"{level}: {name}, {attended}/{total} rehearsals ({attended / max(total, 1):.1%}), longest streak: {longest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from jelenlet.files import atomic_write
+from jelenlet.paths import PARSE_CACHE_DIR
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def content_hash(file_name: str | Path) -> str:
+    with open(file_name, mode="rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def data_hash(data: bytes) -> str:
+    """content_hash of a file already in memory"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ParseCache:
+    """On-disk cache of cleaned per-file dataframes, stored as parquet files.
+
+    Entries are keyed by the caller (content hash + column rules version), so a changed
+    file or changed normalisation rules simply miss. When the cache grows over
+    `max_bytes`, the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir: Path = PARSE_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.parquet"
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        path = self._path(key)
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)  # mark as recently used
+            return df
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:  # broken entry, e.g. interrupted write by an older version
+            print(f"[WARNING] Dropping unreadable cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, key: str, df: pd.DataFrame):
+        # concurrent readers never see a half written entry
+        try:
+            with atomic_write(self._path(key)) as f:
+                df.to_parquet(f)
+        except (OSError, TypeError, ValueError) as e:  # e.g. a column of mixed types: the report must not fail on the cache
+            print(f"[WARNING] Not caching {key}: {e}")
+
+    def evict(self):
+        entries = []
+        for child in self.cache_dir.glob("*.parquet"):
+            try:
+                stat = child.stat()
+            except FileNotFoundError:  # removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, child))
+        total = sum(size for _, size, _ in entries)
+        for _, size, child in sorted(entries):  # oldest first
+            if total <= self.max_bytes:
+                break
+            child.unlink(missing_ok=True)
+            total -= size
@@ -1,35 +1,192 @@
+from __future__ import annotations
+
 from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
 import argparse
 
-from jelenlet.process import process, CsoportType
-from jelenlet.excel_export import to_excel
 from jelenlet.errors import ReportError
-from jelenlet.database import Database
+from jelenlet.paths import DATA_DIR, PARSE_CACHE_DIR
+
+# pandas, openpyxl, xlsxwriter come with these: they are imported only when a report is built,
+# so --help and the argument errors stay fast
+if TYPE_CHECKING:
+    import pandas as pd
+    from jelenlet.process import CsoportType
+    from jelenlet.database import Database
+    from jelenlet.cache import ParseCache
+    from jelenlet.export import ExportFormat
 
 
 def main():
-    data_loc, output_dir, level, delete_db, clean = parse_args()
-    run_program(
-        data_loc, output_dir, level, Database(delete_db=delete_db, clean=clean)
-    )  # 'D:/workspaces/jupyter_notebooks/kozephalados_jelenleti/data/2025_26_osz'
+    args = parse_args()
+    if args.profile or args.profile_memory or args.metrics_json:
+        import logging
+        from jelenlet.metrics import collect_metrics
+
+        if args.profile or args.profile_memory:
+            logging.basicConfig(format="%(message)s")
+            logging.getLogger("jelenlet.metrics").setLevel(logging.INFO)
+        with collect_metrics(peak_memory=args.profile_memory) as metrics:
+            build_reports(args)
+        if args.metrics_json:
+            metrics.to_json(args.metrics_json)
+            print(f"Metrics saved to {args.metrics_json}")
+    else:
+        build_reports(args)
+
 
+def build_reports(args: argparse.Namespace):
+    from jelenlet.cache import ParseCache
+
+    cache = None if args.no_cache else ParseCache(args.cache_dir)
+    if args.szint == "all":
+        run_all_levels(
+            args.folder,
+            args.out,
+            args.db_engine,
+            args.delete_db,
+            args.clean,
+            args.workers,
+            cache,
+            args.incremental,
+            args.format,
+            args.archive,
+        )
+        return
+    db = open_database(args.db_engine, args.delete_db, args.clean, args.db_import)
+    try:
+        run_program(
+            args.folder, args.out, args.szint, db, args.workers, cache, args.incremental, args.format, args.archive
+        )  # 'D:/workspaces/jupyter_notebooks/kozephalados_jelenleti/data/2025_26_osz'
+    finally:
+        if args.db_export:
+            db.export_ini(args.db_export)
+            print(f"Database exported to {args.db_export}")
+        db.close()
+
+
+def open_database(engine: str, delete_db: bool, clean: bool, import_from: Path | None = None, level: CsoportType | None = None) -> Database:
+    """`level`: use the database of that level (data/<level>.database.ini), like the web app, instead of the common one."""
+    from jelenlet.database import Database, SqliteDatabase, EMAILS_DB_FILE, SQLITE_DB_FILE
+
+    ini_file = DATA_DIR / f"{level}.database.ini" if level else EMAILS_DB_FILE
+    if engine == "sqlite":
+        sqlite_file = DATA_DIR / f"{level}.database.sqlite" if level else SQLITE_DB_FILE
+        db = SqliteDatabase(sqlite_file, delete_db=delete_db, clean=clean, import_from=ini_file)
+    else:
+        db = Database(ini_file, delete_db=delete_db, clean=clean)
+    if import_from:
+        db.import_ini(import_from)
+    return db
+
+
+def run_program(
+    data_loc: Path,
+    output_dir: Path,
+    level: CsoportType,
+    db: Database,
+    workers: int = 1,
+    cache: ParseCache | None = None,
+    incremental: bool = False,
+    formats: Sequence[ExportFormat] = ("xlsx",),
+    archive: bool = False,
+) -> Path | None:
+    from jelenlet.process import process
+    from jelenlet.incremental import process_incremental
 
-def run_program(data_loc: Path, output_dir: Path, level: CsoportType, db: Database) -> Path | None:
     try:
         # only add email address - name pairs, if names, or emails need to be fixed:
-        collective_df, output_file_name = process(data_loc, db, level, output_dir)
-        collective_df.reset_index(inplace=True)
-        print(f"Saving report to {output_file_name}")
-        to_excel(output_file_name, collective_df)
-        print("Done. Bye! :)\n")
-        return output_file_name
+        run = process_incremental if incremental else process
+        collective_df, output_file_name = run(data_loc, db, level, output_dir, workers, cache)
+        if archive:
+            archive_report(collective_df, level)
+        return save_report(collective_df, output_file_name, formats)
     except ReportError as e:
         print(e)
         return None
 
 
-def parse_args() -> tuple[Path, Path, CsoportType, bool, bool]:
-    parser = argparse.ArgumentParser(description="Jelenléti adatok feldolgozása és Excel export készítés")
+def save_report(collective_df: pd.DataFrame, output_file_name: Path, formats: Sequence[ExportFormat] = ("xlsx",)) -> Path:
+    """Write the report in every format of `formats`, and return the path of the first one."""
+    from jelenlet.export import export, export_file_name
+    from jelenlet.metrics import span
+
+    collective_df.reset_index(inplace=True)
+    paths = [export_file_name(output_file_name, fmt) for fmt in formats]
+    for fmt, path in zip(formats, paths):
+        print(f"Saving report to {path}")
+        with span(f"export {fmt}") as s:
+            export(path, collective_df, fmt)
+            s.rows = len(collective_df)
+    print("Done. Bye! :)\n")
+    return paths[0]
+
+
+def archive_report(collective_df: pd.DataFrame, level: CsoportType):
+    from jelenlet.archive import append_season
+    from jelenlet.metrics import span
+
+    with span("archive"):
+        archived = append_season(collective_df, level)
+    print(f"Archived: {level}, {len(archived.emails)} members, {len(archived.dates)} rehearsals")
+
+
+def run_all_levels(
+    data_loc: Path,
+    output_dir: Path,
+    db_engine: str = "ini",
+    delete_db: bool = False,
+    clean: bool = False,
+    workers: int = 1,
+    cache: ParseCache | None = None,
+    incremental: bool = False,
+    formats: Sequence[ExportFormat] = ("xlsx",),
+    archive: bool = False,
+) -> dict[CsoportType, Path | None]:
+    """Reports of every level with files in `data_loc`, each level with its own database.
+
+    The folder is listed once and the files of all levels are parsed together (in one process pool).
+    With `incremental`, every level uses its own state instead, and parses its new or changed files.
+    """
+    from jelenlet.process import classify_files, ingest_levels, ReportPipeline
+    from jelenlet.incremental import process_incremental
+    from jelenlet.metrics import span
+
+    results: dict[CsoportType, Path | None] = {}
+    try:
+        levels = classify_files(data_loc) if incremental else ingest_levels(data_loc, workers, cache)
+    except ReportError as e:
+        print(e)
+        return results
+    for level in levels:
+        print(f"===== {level} =====")
+        db = open_database(db_engine, delete_db, clean, level=level)
+        with span(f"level {level}"):
+            try:
+                if incremental:  # the files of the level, the "egyeb" pattern alone would match every level's
+                    collective_df, output_file_name = process_incremental(
+                        data_loc, db, level, output_dir, workers, cache, file_names=levels[level]
+                    )
+                else:
+                    collective_df, output_file_name = ReportPipeline(data_loc, level, ingested=levels[level]).run(db, output_dir)
+                if archive:
+                    archive_report(collective_df, level)
+                results[level] = save_report(collective_df, output_file_name, formats)
+            except ReportError as e:
+                print(e)
+                results[level] = None
+            finally:
+                db.close()
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Jelenléti adatok feldolgozása és Excel export készítés",
+        epilog="Az archivált összesítők lekérdezése: jelenlet-archive query --help\n"
+        + "A mappa figyelése, új táblázat esetén az összesítő frissítése: jelenlet-watch --help",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
     parser.add_argument(
         "folder",
         type=Path,
@@ -44,13 +201,71 @@ def parse_args() -> tuple[Path, Path, CsoportType, bool, bool]:
 
     parser.add_argument(
         "--szint",
-        choices=["kezdo", "kozep", "halado", "egyeb"],
+        choices=["kezdo", "kozep", "halado", "egyeb", "all"],
         default="kozep",
-        help="Csoport szintje: kezdo | kozep | halado | egyeb (alapértelmezett: kozep)",
+        help="Csoport szintje: kezdo | kozep | halado | egyeb | all (alapértelmezett: kozep). "
+        + "all: minden szint összesítője egy futással, szintenként külön adatbázissal (data/<szint>.database.ini)",
     )
 
     parser.add_argument("--delete-db", action="store_true", help="Futás elején kitörli az email-név adatbázist.")
     parser.add_argument("--clean", action="store_true", help="Futás elején eltávolítja a kommenteket az adatbázisból.")
+    parser.add_argument(
+        "--db-engine",
+        choices=["ini", "sqlite"],
+        default="ini",
+        help="Az email-név adatbázis tárolása: ini: data/database.ini, sqlite: data/database.sqlite "
+        + "(első használatkor átveszi a database.ini tartalmát) (alapértelmezett: ini)",
+    )
+    parser.add_argument(
+        "--db-import", type=Path, help="Futás elején az adatbázis tartalmát lecseréli a megadott .ini formátumú fájléra."
+    )
+    parser.add_argument(
+        "--db-export", type=Path, help="Futás végén az adatbázist .ini formátumban kiírja a megadott fájlba, pl. kézi szerkesztéshez."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Párhuzamos Excel beolvasás folyamatainak száma. 1: soros beolvasás, 0: CPU magok száma (alapértelmezett: 1)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=PARSE_CACHE_DIR,
+        help="A beolvasott táblázatok gyorsítótárának mappája (alapértelmezett: <projekt>/tmp/parse_cache)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Gyorsítótár nélkül, minden táblázatot újra beolvas.")
+    parser.add_argument(
+        "--format",
+        nargs="+",
+        choices=["xlsx", "csv", "parquet", "json"],
+        default=["xlsx"],
+        help="Az összesítő formátuma, több is megadható, pl. --format xlsx parquet (alapértelmezett: xlsx). "
+        + "A csv, parquet és json fájlokban a jelenlét 1 / 0, nem X / _.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Csak az előző futás óta új vagy módosult táblázatokat dolgozza fel. Az állapotot a <projekt>/tmp/incremental mappába menti.",
+    )
+
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Az összesítőt a szint archívumához (data/archive) is hozzáadja, "
+        + "amit a 'jelenlet-archive query' paranccsal lehet lekérdezni, pl. több szezonra visszamenőleg.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Futás végén kiírja a lépések és a táblázatok feldolgozási idejét és sorainak számát.",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Mint a --profile, a lépések memóriacsúcsával. Lassítja a futást.",
+    )
+    parser.add_argument("--metrics-json", type=Path, help="A lépések mért adatait JSON formátumban a megadott fájlba menti.")
 
     args = parser.parse_args()
 
@@ -60,10 +275,19 @@ def parse_args() -> tuple[Path, Path, CsoportType, bool, bool]:
     if not args.folder.is_dir():
         parser.error(f"A megadott útvonal nem mappa: {args.folder}")
 
+    if args.db_import and not args.db_import.is_file():
+        parser.error(f"Az importálandó adatbázis nem létezik: {args.db_import}")
+
+    if args.szint == "all" and (args.db_import or args.db_export):
+        parser.error("A --db-import és a --db-export nem használható a --szint all kapcsolóval.")
+
+    if args.workers < 0:
+        parser.error(f"A --workers értéke nem lehet negatív: {args.workers}")
+
     # kimeneti mappa létrehozása
     args.out.mkdir(parents=True, exist_ok=True)
 
-    return args.folder, args.out, args.szint, args.delete_db, args.clean
+    return args
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+"""Hungarian alphabetical order, without the process-global locale.
+
+    a á b c cs d dz dzs e é f g gy h i í j k l ly m n ny o ó ö ő p q r s sz t ty u ú ü ű v w x y z zs
+
+Like the hu_HU locale: short and long vowels (a - á, ö - ő) differ only if the names are otherwise the
+same, the digraphs are single letters (Csizmár after Czakó), and the doubled digraphs are two of
+them (Hosszú: h o sz sz ú). Names are compared word by word, so Kis Anna comes before Kiss Anna.
+"""
+
+import unicodedata
+from functools import lru_cache
+
+ALPHABET = [
+    "a", "b", "c", "cs", "d", "dz", "dzs", "e", "f", "g", "gy", "h", "i", "j", "k", "l", "ly", "m", "n", "ny",
+    "o", "ö", "p", "q", "r", "s", "sz", "t", "ty", "u", "ü", "v", "w", "x", "y", "z", "zs",
+]  # fmt: skip
+DIGRAPHS = {letter for letter in ALPHABET if len(letter) > 1}
+LONG_VOWELS = {"á": "a", "é": "e", "í": "i", "ó": "o", "ő": "ö", "ú": "u", "ű": "ü"}
+
+# key characters: word separator < digits < letters, each compares as one character
+_SEPARATOR = "\x01"
+_RANKS = {letter: chr(0x100 + i) for i, letter in enumerate(ALPHABET)}
+_RANKS.update({str(d): chr(0x20 + d) for d in range(10)})
+
+
+def split_letters(word: str) -> list[tuple[str, int]]:
+    """The letters of a lowercase word, with the number of characters they take in it.
+
+    'hosszú' -> [('h', 1), ('o', 1), ('sz', 1), ('sz', 2), ('ú', 1)]
+    """
+    result = []
+    i = 0
+    while i < len(word):
+        for size in (3, 2):
+            if word[i : i + size] in DIGRAPHS:
+                result.append((word[i : i + size], size))
+                i += size
+                break
+            # doubled digraph, written with the first letter doubled: ssz -> sz sz, ddzs -> dzs dzs
+            if word[i] == word[i + 1 : i + 2] and word[i + 1 : i + 1 + size] in DIGRAPHS:
+                result += [(word[i + 1 : i + 1 + size], 1), (word[i + 1 : i + 1 + size], size)]
+                i += 1 + size
+                break
+        else:
+            result.append((word[i], 1))
+            i += 1
+    return result
+
+
+def _base_letter(letter: str) -> tuple[str, int]:
+    """The letter of the alphabet and the accent rank: 'a' -> ('a', 0), 'á' -> ('a', 1), foreign accents: 2 or more"""
+    if letter in _RANKS:
+        return letter, 0
+    if letter in LONG_VOWELS:
+        return LONG_VOWELS[letter], 1
+    decomposed = unicodedata.normalize("NFD", letter)
+    base = decomposed[0]
+    if base in _RANKS:  # foreign accents after the Hungarian ones
+        return base, 2 + sum(ord(c) for c in decomposed[1:])
+    return "", 0  # punctuation: ignored, but for the tie break on the name itself
+
+
+@lru_cache(maxsize=65536)
+def hungarian_sort_key(name: str) -> str:
+    """A string, that sorts names in Hungarian alphabetical order with the usual str comparison.
+
+    Three levels, like a collation: letters, then accents, then case, and the name itself breaks
+    the remaining ties, so the order is deterministic. lru_cache is thread safe.
+    """
+    primary, accents, case = [], [], []
+    for word in unicodedata.normalize("NFC", name).replace("-", " ").split():
+        lower = word.lower()
+        i = 0
+        for letter, size in split_letters(lower):
+            original = word[i : i + size]
+            i += size
+            base, accent = _base_letter(letter)
+            if not base:
+                continue
+            primary.append(_RANKS[base])
+            accents.append(chr(0x20 + accent))
+            case.append("0" if original == lower[i - size : i] else "1")  # lowercase first
+        primary.append(_SEPARATOR)
+    return "".join(primary) + "\x00" + "".join(accents) + "\x00" + "".join(case) + "\x00" + name
+
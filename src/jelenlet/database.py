@@ -1,3 +1,10 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Mapping
+from jelenlet.files import atomic_write
 from jelenlet.paths import DATA_DIR
 from pathlib import Path
 
@@ -5,35 +12,106 @@ EMAILS_DB_FILE = DATA_DIR.joinpath("database.ini")
 
 
 class Database:
+    """Email - name pairs in an ini like text file.
+
+    The parsed content is kept in memory, and only read again when the file's mtime, size
+    or inode changes. db_append only buffers the lines, flush() writes them in one atomic
+    replace of the file. The read_* methods return read-only views, that don't change
+    afterwards: changes go to new dicts.
+    """
+
     def __init__(self, db_file: Path = EMAILS_DB_FILE, delete_db=False, clean=False) -> None:
         self.DB_FILE = db_file
+        self._signature: tuple[int, int, int] | None = None  # of the file content in _lines
+        self._lines: list[str] = []
+        self._pending: list[str] = []  # appended, not yet flushed lines
+        self._email_name: dict[str, str] = {}
+        self._name_emails: dict[str, set[str]] = {}  # reverse index
+        self._shared = False  # the dicts were returned by a read_* method: copy them before changing
         if not self.DB_FILE.exists() or delete_db:
-            self.DB_FILE.write_text(
-                "# TODO: add <email> = <name> lines here\n#Lines beginning with # are comments, they can be removed.\n\n"
+            self.write_all_lines(
+                ["# TODO: add <email> = <name> lines here\n", "#Lines beginning with # are comments, they can be removed.\n", "\n"]
             )
         if clean:  # remove comments
             self.remove_comments()
 
-    def read_email_name_database(self) -> dict[str, str]:
+    def _load(self):
+        stat = os.stat(self.DB_FILE)
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if signature == self._signature:
+            return
         with open(self.DB_FILE, encoding="utf-8") as f:
-            lines = (line.strip() for line in f.readlines() if "[" not in line)  # ignore sections
+            self._lines = f.readlines()
+        self._signature = signature
+        self._email_name = {}
+        self._name_emails = {}
+        self._shared = False
+        self._add_pairs(self._lines + self._pending)
+
+    def _add_pairs(self, lines: list[str]):
+        pairs = list(_parse_pairs(lines))
+        if pairs and self._shared:
+            self._email_name = dict(self._email_name)
+            self._name_emails = {name: set(emails) for name, emails in self._name_emails.items()}
+            self._shared = False
+        for email, name in pairs:
+            old_name = self._email_name.get(email)
+            if old_name is not None:
+                self._name_emails[old_name].discard(email)
+                if not self._name_emails[old_name]:
+                    del self._name_emails[old_name]
+            self._email_name[email] = name
+            self._name_emails.setdefault(name, set()).add(email)
 
-        lines = (line for line in lines if line)  # ignore empty lines
-        # ignore comments and lines not containing =
-        uncommented_pairs = (line.split("=") for line in lines if not _is_comment(line) and "=" in line)
-        return {k.strip(): v.strip() for k, v in uncommented_pairs}
+    def read_email_name_database(self) -> Mapping[str, str]:
+        """The current email -> name pairs, appended lines included."""
+        self._load()
+        self._shared = True
+        return MappingProxyType(self._email_name)
+
+    def read_name_email_index(self) -> Mapping[str, set[str]]:
+        """name -> emails, the reverse of read_email_name_database(). Do not modify the sets."""
+        self._load()
+        self._shared = True
+        return MappingProxyType(self._name_emails)
 
     def db_append(self, line: str):
-        with open(self.DB_FILE, encoding="utf-8", mode="a") as f:
-            print(line, file=f)
+        self._load()
+        new_lines = (line + "\n").splitlines(keepends=True)
+        self._pending.extend(new_lines)
+        self._add_pairs(new_lines)
+
+    def flush(self):
+        """Write the appended lines to the file."""
+        if not self._pending:
+            return
+        self._load()  # don't lose changes made by someone else since the last read
+        lines = self._lines + self._pending
+        self._pending = []
+        self.write_all_lines(lines)
 
     def read_all_lines(self):
-        with open(self.DB_FILE, encoding="utf-8") as f:
-            return f.readlines()
+        self._load()
+        return self._lines + self._pending
 
     def write_all_lines(self, lines: list[str]):
-        with open(self.DB_FILE, encoding="utf-8", mode="w") as f:
-            f.writelines(lines)
+        with atomic_write(self.DB_FILE, mode="w") as f:
+            f.write("".join(lines))
+        self._signature = None
+        self._pending = []
+
+    def close(self):
+        pass  # the file is only open while read or written
+
+    def import_ini(self, ini_file: Path):
+        """Replace the content with the one of an ini format database file."""
+        with open(ini_file, encoding="utf-8") as f:
+            self.write_all_lines(f.readlines())
+
+    def export_ini(self, ini_file: Path):
+        """Write the content in the ini format, e.g. for hand editing and import_ini."""
+        with atomic_write(ini_file, mode="w") as f:
+            f.write("".join(self.read_all_lines()))
 
     def remove_comments(self):
         db = self.read_email_name_database()
@@ -41,6 +119,14 @@ class Database:
         self.write_all_lines(lines)
 
 
+def _parse_pairs(lines: list[str]):
+    stripped = (line.strip() for line in lines if "[" not in line)  # ignore sections
+    stripped = (line for line in stripped if line)  # ignore empty lines
+    # ignore comments and lines not containing =
+    uncommented_pairs = (line.split("=") for line in stripped if not _is_comment(line) and "=" in line)
+    return ((k.strip(), v.strip()) for k, v in uncommented_pairs)
+
+
 def _is_comment(line: str):
     line = line.strip()
     return line.startswith("#") or line.startswith(";")
@@ -49,3 +135,138 @@ def _is_comment(line: str):
 def db_append(line: str):
     with open(EMAILS_DB_FILE, encoding="utf-8", mode="a") as f:
         print(line, file=f)
+
+
+SQLITE_DB_FILE = DATA_DIR.joinpath("database.sqlite")
+
+# position: the order of the lines, shared by the two tables, so the ini format round trips
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS email_names (email TEXT PRIMARY KEY, name TEXT NOT NULL, position INTEGER NOT NULL DEFAULT 0);
+CREATE INDEX IF NOT EXISTS email_names_name ON email_names (name);
+CREATE TABLE IF NOT EXISTS suggestions (id INTEGER PRIMARY KEY AUTOINCREMENT, line TEXT NOT NULL, position INTEGER NOT NULL DEFAULT 0);
+"""
+
+
+class SqliteDatabase(Database):
+    """Same interface as Database, stored in an sqlite file.
+
+    Active email - name pairs are in an indexed table, everything else appended (comments,
+    suggestions of the fixers) goes to the suggestions table, both with the position of the line.
+    read_all_lines / write_all_lines convert from / to the ini format, for hand editing. Safe to
+    share between threads and processes: writes are single transactions. close() when done.
+    """
+
+    def __init__(self, db_file: Path = SQLITE_DB_FILE, delete_db=False, clean=False, import_from: Path | None = None) -> None:
+        self.DB_FILE = db_file
+        is_new = not Path(db_file).exists()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+        self._add_positions()
+        self._data_version: int | None = None  # of the cached pairs, see _load
+        self._pending: list[str] = []
+        self._email_name: dict[str, str] = {}
+        self._name_emails: dict[str, set[str]] = {}
+        self._shared = False
+        if is_new and not delete_db and import_from and Path(import_from).exists():
+            self.import_ini(import_from)
+        elif is_new or delete_db:  # delete_db: empty, even if there is an ini to import
+            self.write_all_lines(
+                ["# TODO: add <email> = <name> lines here\n", "#Lines beginning with # are comments, they can be removed.\n", "\n"]
+            )
+        if clean:  # remove comments
+            self.remove_comments()
+
+    def _add_positions(self):
+        """Files made before the position columns: the pairs first, then the rest, as read_all_lines returned them."""
+        def has_positions(cur) -> bool:
+            return "position" in [row[1] for row in cur.execute("PRAGMA table_info(suggestions)")]
+
+        if has_positions(self._conn):
+            return
+        with self._lock, self._transaction() as cur:
+            if has_positions(cur):  # an other process added them
+                return
+            cur.execute("ALTER TABLE email_names ADD COLUMN position INTEGER NOT NULL DEFAULT 0")
+            cur.execute("ALTER TABLE suggestions ADD COLUMN position INTEGER NOT NULL DEFAULT 0")
+            cur.execute("UPDATE email_names SET position = rowid")
+            cur.execute("UPDATE suggestions SET position = id + (SELECT COALESCE(MAX(position), 0) FROM email_names)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _load(self):
+        with self._lock:
+            # changes, when an other connection commits to the database
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return
+            self._data_version = data_version
+            self._email_name = {}
+            self._name_emails = {}
+            self._shared = False
+            for email, name in self._conn.execute("SELECT email, name FROM email_names ORDER BY position"):
+                self._email_name[email] = name
+                self._name_emails.setdefault(name, set()).add(email)
+            self._add_pairs(self._pending)
+
+    def db_append(self, line: str):
+        with self._lock:
+            super().db_append(line)
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            with self._transaction() as cur:
+                _insert_lines(cur, self._pending)
+            self._pending = []
+            self._data_version = None  # own commits don't change data_version
+
+    def read_all_lines(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT position, email || ' = ' || name || char(10) FROM email_names "
+                + "UNION ALL SELECT position, line FROM suggestions ORDER BY position"
+            )
+            return [line for _, line in rows] + self._pending
+
+    def write_all_lines(self, lines: list[str]):
+        with self._lock:
+            with self._transaction() as cur:
+                cur.execute("DELETE FROM email_names")
+                cur.execute("DELETE FROM suggestions")
+                _insert_lines(cur, lines)
+            self._pending = []
+            self._data_version = None
+
+    def remove_comments(self):
+        with self._lock:
+            self.flush()
+            with self._transaction() as cur:
+                cur.execute("DELETE FROM suggestions")
+
+    @contextmanager
+    def _transaction(self):
+        cur = self._conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")  # take the write lock now, not at the first write
+        try:
+            yield cur
+            cur.execute("COMMIT")
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+
+
+def _insert_lines(cur: sqlite3.Cursor, lines: list[str]):
+    """Add `lines` after the ones already in the database. A pair of an email already in it moves to its new position."""
+    last = cur.execute("SELECT MAX(position) FROM (SELECT position FROM email_names UNION ALL SELECT position FROM suggestions)")
+    start = (last.fetchone()[0] or 0) + 1
+    for position, line in enumerate(lines, start):
+        pairs = [(email, name, position) for email, name in _parse_pairs([line])]
+        if pairs:
+            cur.executemany("INSERT OR REPLACE INTO email_names (email, name, position) VALUES (?, ?, ?)", pairs)
+        else:
+            cur.execute("INSERT INTO suggestions (line, position) VALUES (?, ?)", (line if line.endswith("\n") else line + "\n", position))
@@ -1,3 +1,12 @@
 class ReportError(Exception):
     def __init__(self, msg):
         super().__init__(msg)
+
+
+class IssuesError(ReportError):
+    """The fixers found names or emails to fix: their NameIssue and EmailIssue lists, also written to the database."""
+
+    def __init__(self, msg, name_issues: list, email_issues: list):
+        super().__init__(msg)
+        self.name_issues = name_issues
+        self.email_issues = email_issues
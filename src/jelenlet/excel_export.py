@@ -1,33 +1,81 @@
+import numpy as np
 import pandas as pd
+import xlsxwriter
 
+ATTENDANCE_MARKERS = np.array(["_", "X"], dtype=object)
 
-def to_excel(fname, df):
-    with pd.ExcelWriter(fname, engine="xlsxwriter") as writer:
-        df.to_excel(writer, sheet_name="Sheet1", index=False)
 
-        worksheet = writer.sheets["Sheet1"]
+def render_attendance_markers(df: pd.DataFrame) -> pd.DataFrame:
+    # the int8 columns of the attendance matrix are the rehearsal dates: 1 -> X, 0 -> _
+    date_columns = [c for c in df.columns if df[c].dtype == np.int8]
+    return df.assign(**{c: ATTENDANCE_MARKERS[df[c].to_numpy()] for c in date_columns})
 
-        # set columns widhts to it's max text length
-        for column in df:
-            column_length = max(df[column].astype(str).map(len).max(), len(str(column)))
-            col_idx = df.columns.get_loc(column)
-            worksheet.set_column(col_idx, col_idx, column_length)
 
+def column_width(values: np.ndarray, header: str) -> int:
+    """Length of the longest value of the column, without making a string copy of it."""
+    if values.dtype == np.int8:  # attendance: "X" or "_"
+        return max(1, len(header))
+    if np.issubdtype(values.dtype, np.integer):
+        longest = max((len(str(values.max())), len(str(values.min()))), default=0) if len(values) else 0
+        return max(longest, len(header))
+    return max(max((len(v) if isinstance(v, str) else len(str(v)) for v in values), default=0), len(header))
+
+
+def _cell(value):
+    if isinstance(value, float) and value != value:  # NaN: empty cell, like pandas
+        return None
+    return value
+
+
+def iter_rows(arrays: list[np.ndarray]):
+    """Python values of the rows, X / _ markers for the int8 attendance columns."""
+    converters = [ATTENDANCE_MARKERS.__getitem__ if a.dtype == np.int8 else _cell for a in arrays]
+    # tolist: python numbers instead of numpy scalars, object columns only copy references
+    columns = [a if a.dtype == np.int8 else a.tolist() for a in arrays]
+    for values in zip(*columns):
+        yield [convert(v) for convert, v in zip(converters, values)]
+
+
+def to_excel(fname, df: pd.DataFrame):
+    """Write the summary (after reset_index) row by row, in xlsxwriter's constant memory mode.
+
+    `fname`: a path, or a binary buffer (e.g. BytesIO) to write the xlsx into.
+    The int8 attendance columns are written as X / _ markers.
+    """
+    columns = [str(c) for c in df.columns]
+    arrays = [df[c].to_numpy() for c in df.columns]
+
+    workbook = xlsxwriter.Workbook(fname, {"constant_memory": True})
+    try:
+        worksheet = workbook.add_worksheet("Sheet1")
+        # set columns widhts to it's max text length
+        for col_idx, (values, header) in enumerate(zip(arrays, columns)):
+            worksheet.set_column(col_idx, col_idx, column_width(values, header))
         worksheet.freeze_panes(1, 3)
-        color_alternating_rows(writer, worksheet, df)
+
+        # the header format of pandas' to_excel
+        header_format = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        worksheet.write_row(0, 0, columns, header_format)
+        # constant_memory: rows must be written in order, and are flushed to disk one by one
+        for row_idx, row in enumerate(iter_rows(arrays), start=1):
+            worksheet.write_row(row_idx, 0, row)
+
+        color_alternating_rows(workbook, worksheet, len(df), len(columns))
+    finally:
+        workbook.close()
 
 
-def color_alternating_rows(writer, worksheet, df):
-    # row_format_even = writer.book.add_format({"bg_color": "#DDDDDD", "border": 1})
-    # row_format_odd = writer.book.add_format({"bg_color": "#FFFFFF", "border": 1})
-    row_format_even = writer.book.add_format({"bg_color": "#DDDDDD", "right": 1})
-    row_format_odd = writer.book.add_format({"bg_color": "#FFFFFF", "right": 1})
+def color_alternating_rows(workbook, worksheet, n_rows: int, n_columns: int):
+    # row_format_even = workbook.add_format({"bg_color": "#DDDDDD", "border": 1})
+    # row_format_odd = workbook.add_format({"bg_color": "#FFFFFF", "border": 1})
+    row_format_even = workbook.add_format({"bg_color": "#DDDDDD", "right": 1})
+    row_format_odd = workbook.add_format({"bg_color": "#FFFFFF", "right": 1})
 
     worksheet.conditional_format(
         first_row=1,
         first_col=0,
-        last_row=len(df),
-        last_col=len(df.columns) - 1,
+        last_row=n_rows,
+        last_col=n_columns - 1,
         options={
             "type": "formula",
             "criteria": "=MOD(ROW(),2)=0",
@@ -38,8 +86,8 @@ def color_alternating_rows(writer, worksheet, df):
     worksheet.conditional_format(
         first_row=1,
         first_col=0,
-        last_row=len(df),
-        last_col=len(df.columns) - 1,
+        last_row=n_rows,
+        last_col=n_columns - 1,
         options={
             "type": "formula",
             "criteria": "=MOD(ROW(),2)=1",
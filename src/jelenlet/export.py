@@ -0,0 +1,41 @@
+from pathlib import Path
+from typing import Callable, Literal
+
+import pandas as pd
+
+from jelenlet.excel_export import to_excel
+
+ExportFormat = Literal["xlsx", "csv", "parquet", "json"]
+
+
+def to_csv(fname, df: pd.DataFrame):
+    df.to_csv(fname, index=False, encoding="utf-8")
+
+
+def to_parquet(fname, df: pd.DataFrame):
+    df.to_parquet(fname, index=False)  # the attendance columns stay int8
+
+
+def to_json(fname, df: pd.DataFrame):
+    df.to_json(fname, orient="records", force_ascii=False, indent=1)
+
+
+# format -> file extension, writer, mime type of the download.
+# Only the xlsx has X / _ markers, the other formats are for programs: 1 / 0 attendance values.
+EXPORT_FORMATS: dict[ExportFormat, tuple[str, Callable[..., None], str]] = {
+    "xlsx": (".xlsx", to_excel, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": (".csv", to_csv, "text/csv"),
+    "parquet": (".parquet", to_parquet, "application/vnd.apache.parquet"),
+    "json": (".json", to_json, "application/json"),
+}
+
+
+def export(fname, df: pd.DataFrame, fmt: ExportFormat):
+    """Write the summary (after reset_index) to a path or a binary buffer, in format `fmt`."""
+    _, writer, _ = EXPORT_FORMATS[fmt]
+    writer(fname, df)
+
+
+def export_file_name(output_file_name: Path, fmt: ExportFormat) -> Path:
+    """The name of the report in `fmt`, from the xlsx name of generate_output_filename()"""
+    return output_file_name.with_suffix(EXPORT_FORMATS[fmt][0])
@@ -0,0 +1,24 @@
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "wb") -> Iterator[IO]:
+    """Write `path` through a temp file next to it, renamed over it at the end: readers never see a half written file.
+
+    On an exception the temp file is removed, and `path` stays as it was. An existing file keeps its permissions.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode=mode, encoding=None if "b" in mode else "utf-8") as f:
+            yield f
+        os.chmod(tmp_name, stat.S_IMODE(os.stat(path).st_mode) if path.exists() else 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.remove(tmp_name)
+        raise
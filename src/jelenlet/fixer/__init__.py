@@ -1,5 +1,17 @@
-from .fixer import name_to_dummy_email
-from .name_fixer import try_fix_name_issues
-from .email_fixer import try_fix_email_issues
+from .fixer import name_to_dummy_email, raise_if_issues
+from .name_fixer import try_fix_name_issues, fix_name_issues, NameCounts, NameIssue
+from .email_fixer import try_fix_email_issues, fix_email_issues, fixed_name_emails, EmailCounts, EmailIssue
 
-__all__ = ["try_fix_name_issues", "try_fix_email_issues", "name_to_dummy_email"]
+__all__ = [
+    "try_fix_name_issues",
+    "try_fix_email_issues",
+    "fix_name_issues",
+    "fix_email_issues",
+    "fixed_name_emails",
+    "raise_if_issues",
+    "name_to_dummy_email",
+    "NameCounts",
+    "NameIssue",
+    "EmailCounts",
+    "EmailIssue",
+]
@@ -0,0 +1,71 @@
+"""Precompiled index of the allowed christian names (data/anyakonyvezheto_utonevek_2019_08.csv).
+
+The index is built on first use, and rebuilt when the CSV changes. To build it in advance, e.g. in a
+deployment step: python -m jelenlet.fixer.allowed_names
+"""
+
+import csv
+import hashlib
+import io
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+
+from jelenlet.errors import ReportError
+from jelenlet.files import atomic_write
+from jelenlet.fixer.name_index import GivenNames
+from jelenlet.paths import ALLOWED_NAMES_INDEX, POSSIBLE_NAMES_CSV
+
+# Bump, when AllowedNamesIndex, GivenNames or the normalization changes: older index files are rebuilt.
+ALLOWED_NAMES_INDEX_VERSION = 1
+
+
+@dataclass
+class AllowedNamesIndex:
+    version: int
+    csv_sha256: str  # of the CSV the index was built from
+    names: frozenset[str]
+    given_names: GivenNames  # normalized (casefolded, accent stripped) lookups and typo correction
+
+
+def parse_names_csv(data: bytes) -> frozenset[str]:
+    rows = csv.reader(io.StringIO(data.decode("utf-8")), delimiter=";")
+    next(rows, None)  # skip header
+    names = frozenset(r[0] for r in rows if r)
+    if not names:
+        raise ReportError("Allowed names were not found in CSV!")
+    return names
+
+
+def build_index(csv_file: Path = POSSIBLE_NAMES_CSV, index_file: Path = ALLOWED_NAMES_INDEX) -> AllowedNamesIndex:
+    data = Path(csv_file).read_bytes()
+    names = parse_names_csv(data)
+    index = AllowedNamesIndex(ALLOWED_NAMES_INDEX_VERSION, hashlib.sha256(data).hexdigest(), names, GivenNames(names))
+    try:
+        Path(index_file).parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(index_file) as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:  # e.g. read only install: works, just builds the index every time
+        print(f"[WARNING] Could not save allowed names index {index_file}: {e}")
+    return index
+
+
+def load_index(csv_file: Path = POSSIBLE_NAMES_CSV, index_file: Path = ALLOWED_NAMES_INDEX) -> AllowedNamesIndex:
+    """The index of `csv_file`, built again if it is missing, of an other version, or `csv_file` changed."""
+    try:
+        with open(index_file, mode="rb") as f:
+            index = pickle.load(f)
+    except FileNotFoundError:
+        return build_index(csv_file, index_file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+        print(f"[WARNING] Rebuilding unreadable allowed names index {index_file}: {e}")
+        return build_index(csv_file, index_file)
+    csv_sha256 = hashlib.sha256(Path(csv_file).read_bytes()).hexdigest()
+    if not isinstance(index, AllowedNamesIndex) or index.version != ALLOWED_NAMES_INDEX_VERSION or index.csv_sha256 != csv_sha256:
+        return build_index(csv_file, index_file)
+    return index
+
+
+if __name__ == "__main__":
+    index = build_index()
+    print(f"Allowed names index: {len(index.names)} names, saved to {ALLOWED_NAMES_INDEX}")
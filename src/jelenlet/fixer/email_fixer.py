@@ -1,8 +1,12 @@
-from collections import defaultdict, Counter
+from collections import Counter
 from dataclasses import dataclass
+from typing import Collection, Mapping
 
 from jelenlet.errors import ReportError
 from jelenlet.database import Database
+from jelenlet.fixer.name_fixer import NameCounts
+
+EmailCounts = dict[str, int]  # distinct emails of a name with their occurrence count, in order of first occurrence
 
 
 @dataclass
@@ -17,14 +21,14 @@ class EmailIssue:
             result = [f"\n# Resolving with: [{self.suggestion}] reason:[{self.reason}]", f"{self.suggestion} = {self.name}"]
         else:
             result = ["\n# Uncomment (at least) one of these:"]
-        for e in set(self.emails):
+        for e in self.emails:
             if e != self.suggestion:
                 result.append(f"# {e} = {self.name}")
         return result
 
 
-def resolve_email_gmail_typo(name, emails) -> EmailIssue | None:
-    emails = list(set(emails))
+def resolve_email_gmail_typo(name: str, emails: EmailCounts) -> EmailIssue | None:
+    emails = list(emails)
     usernames = set(e.split("@")[0] for e in emails if "@" in e)
     domains = set(e.split("@")[1] for e in emails if "@" in e)
     all_same_username = len(usernames) == 1
@@ -34,29 +38,46 @@ def resolve_email_gmail_typo(name, emails) -> EmailIssue | None:
     return None
 
 
-def resolve_email_by_majority(name, emails) -> EmailIssue | None:
+def resolve_email_by_majority(name: str, emails: EmailCounts) -> EmailIssue | None:
     occurances = Counter(emails).most_common()
     most = occurances.pop(0)
     rest_occurance = sum(o[1] for o in occurances)
     confidence_factor = 1
     if most[1] >= 2 and most[1] > confidence_factor * rest_occurance:
-        return EmailIssue(name, list(set(emails)), most[0], f"based on occurance {most[1]} to {rest_occurance}")
+        return EmailIssue(name, list(emails), most[0], f"based on occurance {most[1]} to {rest_occurance}")
     return None
 
 
-def detect_issue_email(name: str, emails: list[str]) -> EmailIssue | None:
-    if len(set(emails)) == 1:
+def detect_issue_email(name: str, emails: EmailCounts) -> EmailIssue | None:
+    if len(emails) == 1:
         return None
     resolvers = [resolve_email_gmail_typo, resolve_email_by_majority]
     for resolver in resolvers:
         issue = resolver(name, emails)
         if issue:
             return issue
-    return EmailIssue(name, list(set(emails)), None, "ACTION REQUIRED: Could not make suggestion")
+    return EmailIssue(name, list(emails), None, "ACTION REQUIRED: Could not make suggestion")
+
+
+def fixed_name_emails(
+    email_names: dict[str, NameCounts], email_name: dict[str, str], unresolved: Collection[str] = ()
+) -> dict[str, EmailCounts]:
+    """Emails per name, by the names of the name fixer: every occurrence of an email counts for its fixed name.
+
+    `unresolved`: emails left out, e.g. the ones of name issues without a suggestion. Their name is only a
+    placeholder, an email fix based on it would settle the name issue.
+    """
+    name_emails: dict[str, EmailCounts] = {}
+    for email, names in email_names.items():
+        if email in unresolved:
+            continue
+        emails = name_emails.setdefault(email_name[email], {})
+        emails[email] = emails.get(email, 0) + sum(names.values())
+    return name_emails
 
 
-def find_email_issues(name_emails: dict[str, list[str]], email_name_db: dict[str, str]):
-    issues = (detect_issue_email(n, es) for n, es in name_emails.items() if n not in email_name_db.values())
+def find_email_issues(name_emails: dict[str, EmailCounts], name_email_index: Mapping[str, set[str]]):
+    issues = (detect_issue_email(n, es) for n, es in name_emails.items() if n not in name_email_index)
     return [i for i in issues if i]
 
 
@@ -66,26 +87,22 @@ def write_email_issues_to_db(issues: list[EmailIssue], db: Database):
             db.db_append(line)
 
 
-def try_fix_email_issues(
-    email_names: dict[str, list[str]], email_name: dict[str, str], db: Database
-) -> tuple[dict[str, str], dict[str, str]]:
-    EMAIL_NAMES_DATABASE = db.read_email_name_database()
+def fix_email_issues(
+    name_emails: dict[str, EmailCounts], email_name: dict[str, str], db: Database, names_to_check: set[str] | None = None
+) -> tuple[dict[str, str], dict[str, str], list[EmailIssue]]:
+    """Like try_fix_email_issues, but doesn't abort: the issues are written to `db`, and returned too."""
+    NAME_EMAILS_INDEX = db.read_name_email_index()
 
-    name_emails = defaultdict(list)
-    for e, ns in email_names.items():
-        for n in ns:
-            name_emails[n].append(e)
-
-    email_issues = find_email_issues(name_emails, EMAIL_NAMES_DATABASE)
-    if email_issues:
-        write_email_issues_to_db(email_issues, db)
-        raise ReportError("Errors found during email checks. Add apropriate lines to email_name_database to continue. Aborting...")
+    checked = name_emails if names_to_check is None else {n: name_emails[n] for n in name_emails if n in names_to_check}
+    email_issues = find_email_issues(checked, NAME_EMAILS_INDEX)
+    write_email_issues_to_db(email_issues, db)
 
     wrong_right_emails = {}
     for name, emails in name_emails.items():
-        emails = list(set(emails))
         if len(emails) > 1:
-            valid_emails = [e for e in emails if e in EMAIL_NAMES_DATABASE]
+            # names of emails in the database come from the database, so these are the emails of this name in it
+            db_emails = NAME_EMAILS_INDEX.get(name, set())
+            valid_emails = [e for e in emails if e in db_emails]
             if len(valid_emails) == 1:
                 valid_email = valid_emails[0]
                 wrong_emails = {e for e in emails if e != valid_email}
@@ -97,4 +114,14 @@ def try_fix_email_issues(
 
     email_name_without_wrong = {e: n for e, n in email_name.items() if e not in wrong_right_emails}
     print(f"Wrong->Right email substitutions:{wrong_right_emails}")
+    return wrong_right_emails, email_name_without_wrong, email_issues
+
+
+def try_fix_email_issues(
+    name_emails: dict[str, EmailCounts], email_name: dict[str, str], db: Database, names_to_check: set[str] | None = None
+) -> tuple[dict[str, str], dict[str, str]]:
+    """`names_to_check` limits the issue detection to these names, the rest is known to be issue free."""
+    wrong_right_emails, email_name_without_wrong, email_issues = fix_email_issues(name_emails, email_name, db, names_to_check)
+    if email_issues:
+        raise ReportError("Errors found during email checks. Add apropriate lines to email_name_database to continue. Aborting...")
     return wrong_right_emails, email_name_without_wrong
@@ -1,5 +1,7 @@
 import re
 
+from jelenlet.errors import IssuesError
+
 
 def name_to_dummy_email(name: str) -> str:
     # fallback in case name itself is NaN or empty
@@ -9,3 +11,14 @@ def name_to_dummy_email(name: str) -> str:
     # normalize name -> lowercase, ascii-ish, dot-separated
     local_part = re.sub(r"[^a-z0-9]+", ".", name.lower()).strip(".")
     return f"{local_part}@DUMMY.LOCAL"
+
+
+def raise_if_issues(name_issues: list, email_issues: list):
+    """Abort once, after both the name and the email checks wrote their issues to the database."""
+    if name_issues or email_issues:
+        raise IssuesError(
+            f"Errors found during name ({len(name_issues)}) and email ({len(email_issues)}) checks. "
+            "Add apropriate lines to EMAIL_NAME_DATABASE to continue. Aborting...",
+            name_issues,
+            email_issues,
+        )
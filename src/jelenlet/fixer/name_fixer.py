@@ -1,23 +1,28 @@
-import csv
 import string
-from functools import cache
+from functools import cache, partial
 from collections import Counter
 from dataclasses import dataclass
+from typing import Mapping
 
-from jelenlet.paths import POSSIBLE_NAMES_CSV
 from jelenlet.errors import ReportError
 from jelenlet.database import Database
+from jelenlet.fixer.allowed_names import AllowedNamesIndex, load_index
+from jelenlet.fixer.name_index import GivenNames, NameIndex, accent_count, edit_distance, name_key, normalize
+
+NameCounts = dict[str, int]  # distinct names of an email with their occurrence count, in order of first occurrence
 
 
 @cache
-def read_allowed_names() -> set[str]:
-    with open(POSSIBLE_NAMES_CSV, encoding="utf-8") as csvfile:
-        rows = csv.reader(csvfile, delimiter=";")
-        next(rows)  # skip header
-        names = {r[0] for r in rows}
-        if not names:
-            raise ReportError("Allowed names were not found in CSV!")
-        return names
+def allowed_names_index() -> AllowedNamesIndex:
+    return load_index()  # once per process
+
+
+def read_allowed_names() -> frozenset[str]:
+    return allowed_names_index().names
+
+
+def allowed_given_names() -> GivenNames:
+    return allowed_names_index().given_names
 
 
 @dataclass
@@ -32,53 +37,100 @@ class NameIssue:
             result = [f"\n# Resolving with: [{self.suggestion}] reason:[{self.reason}]", f"{self.email} = {self.suggestion}"]
         else:
             result = [f"\n# Uncomment one of these. reason[{self.reason}]"]
-        for n in set(self.names):
+        for n in self.names:
             if n != self.suggestion:
                 result.append(f"# {self.email} = {n}")
         return result
 
 
-def resolve_capitulization(email: str, names: list[str]) -> NameIssue | None:
+def resolve_capitulization(email: str, names: NameCounts) -> NameIssue | None:
     lowercase_names_set = {n.lower() for n in names}
     if len(lowercase_names_set) == 1:
-        suggestion = string.capwords(names[0])
-        return NameIssue(email, list(set(names)), suggestion, "simple uppercase - lowercase problem detected")
+        suggestion = string.capwords(next(iter(names)))
+        return NameIssue(email, list(names), suggestion, "simple uppercase - lowercase problem detected")
     return None
 
 
-def resolve_only_one_allowed_christian_name(email: str, names: list[str]) -> NameIssue | None:
-    names_unique = list(set(names))
+def resolve_only_one_allowed_christian_name(email: str, names: NameCounts) -> NameIssue | None:
+    names_unique = list(names)
     # v[i] = True, if names_unique[i]'s last part is an allowed christian name
     v: list[bool] = [n.split()[-1] in read_allowed_names() for n in names_unique]
     if sum(1 if x else 0 for x in v) == 1:  # if there is only one such name variation, that has a valid first name
         suggestion = names_unique[v.index(True)]
-        return NameIssue(email, list(set(names)), suggestion, "only one last christian name detected")
+        return NameIssue(email, names_unique, suggestion, "only one last christian name detected")
     return None
 
 
-def resolve_by_majority(email: str, names: list[str]) -> NameIssue | None:
+def resolve_by_majority(email: str, names: NameCounts) -> NameIssue | None:
     occurances = Counter(names).most_common()
     most = occurances.pop(0)
     rest_occurance = sum(o[1] for o in occurances)
     confidence_factor = 1
     if most[1] >= 2 and most[1] > confidence_factor * rest_occurance:
-        return NameIssue(email, list(set(names)), most[0], f"based on occurance {most[1]} to {rest_occurance}")
+        return NameIssue(email, list(names), most[0], f"based on occurance {most[1]} to {rest_occurance}")
+    return None
+
+
+def compose_name(names: NameCounts) -> str:
+    """One name from the variants: the most accented form of every part, christian name last."""
+    parts_by_normalized: dict[str, list[str]] = {}
+    for part in (p for n in names for p in n.split()):
+        parts_by_normalized.setdefault(normalize(part), []).append(part)
+    given_names = allowed_given_names()
+
+    def best_form(part: str) -> str:
+        form = max(parts_by_normalized[normalize(part)], key=accent_count)  # first one of the most accented
+        form = given_names.restore_accents(form) if accent_count(form) == 0 else form
+        return string.capwords(form) if form.islower() else form
+
+    parts = [best_form(p) for p in max(names, key=accent_count).split()]
+    if len(parts) >= 2 and parts[0] in given_names and parts[-1] not in given_names:
+        parts = parts[1:] + parts[:1]  # "Tamás Görbe" -> "Görbe Tamás"
+    if len(parts) >= 2 and parts[-1] not in given_names:
+        parts[-1] = given_names.correct(parts[-1]) or parts[-1]
+    return " ".join(parts)
+
+
+def given_name(name: str, given_names: GivenNames) -> str | None:
+    """The normalized christian name of `name`, last or (in reversed order) first: 'Tamás Görbe' -> 'tamas'"""
+    parts = name.split()
+    for part in (parts[-1], parts[0]) if parts else ():
+        if part in given_names:
+            return normalize(part)
+    return None
+
+
+def resolve_by_fuzzy_match(email: str, names: NameCounts, index: NameIndex) -> NameIssue | None:
+    given_names = allowed_given_names()
+    if len({given_name(n, given_names) for n in names} - {None}) > 1:
+        return None  # e.g. Nagy Péter and Nagy Petra: two persons, or a choice only a human can make
+    known = {index.lookup(n) for n in names}
+    if len(known) == 1 and None not in known:
+        suggestion = known.pop()
+        return NameIssue(email, list(names), suggestion, "close to a name already in the database")
+    keys = [name_key(n) for n in names]
+    if all(edit_distance(keys[0], k, index.max_distance) <= index.max_distance for k in keys):
+        return NameIssue(email, list(names), compose_name(names), "accent, typo or name order difference")
     return None
 
 
-def detect_issue(email: str, names: list[str]) -> NameIssue | None:
-    if len(set(names)) == 1:
+def detect_issue(email: str, names: NameCounts, index: NameIndex | None = None) -> NameIssue | None:
+    """`index`: the names already in the database, for the fuzzy match."""
+    if len(names) == 1:
         return None
     resolvers = [resolve_capitulization, resolve_only_one_allowed_christian_name, resolve_by_majority]
+    resolvers.append(partial(resolve_by_fuzzy_match, index=index or NameIndex([])))
     for resolver in resolvers:
         issue = resolver(email, names)
         if issue:
             return issue
-    return NameIssue(email, list(set(names)), None, "ACTION REQUIRED: Could not make suggestion")
+    return NameIssue(email, list(names), None, "ACTION REQUIRED: Could not make suggestion")
 
 
-def find_name_issues(email_names: dict[str, list[str]], EMAIL_NAMES_DB: dict[str, str]) -> list[NameIssue]:
-    issues = (detect_issue(e, ns) for e, ns in email_names.items() if e not in EMAIL_NAMES_DB)
+def find_name_issues(email_names: dict[str, NameCounts], EMAIL_NAMES_DB: Mapping[str, str]) -> list[NameIssue]:
+    to_check = {e: ns for e, ns in email_names.items() if e not in EMAIL_NAMES_DB and len(ns) > 1}
+    index = NameIndex(set(EMAIL_NAMES_DB.values())) if to_check else None  # only built, when needed
+    issues = (detect_issue(e, ns, index) for e, ns in to_check.items())
     return [i for i in issues if i]
 
 
@@ -88,14 +140,23 @@ def write_name_issues_to_db(issues: list[NameIssue], db: Database):
             db.db_append(line)
 
 
-def try_fix_name_issues(email_names: dict[str, list[str]], db: Database) -> dict[str, str]:
+def fix_name_issues(email_names: dict[str, NameCounts], db: Database) -> tuple[dict[str, str], list[NameIssue]]:
+    """Like try_fix_name_issues, but doesn't abort: the issues are written to `db`, and returned.
+
+    The names of emails with issues are the suggested ones (or the first one), so the email checks can run too.
+    """
     name_issues = find_name_issues(email_names, db.read_email_name_database())
-    if name_issues:
-        write_name_issues_to_db(name_issues, db)
-        raise ReportError("Errors found during name checks. Add apropriate lines to EMAIL_NAME_DATABASE to continue. Aborting...")
+    write_name_issues_to_db(name_issues, db)
 
     DB = db.read_email_name_database()
     new_email_name = {}
     for email in email_names:
-        new_email_name[email] = DB[email] if email in DB else email_names[email][0]
+        new_email_name[email] = DB[email] if email in DB else next(iter(email_names[email]))  # the first one
+    return new_email_name, name_issues
+
+
+def try_fix_name_issues(email_names: dict[str, NameCounts], db: Database) -> dict[str, str]:
+    new_email_name, name_issues = fix_name_issues(email_names, db)
+    if name_issues:
+        raise ReportError("Errors found during name checks. Add apropriate lines to EMAIL_NAME_DATABASE to continue. Aborting...")
     return new_email_name
@@ -0,0 +1,138 @@
+import unicodedata
+from functools import lru_cache
+from typing import Iterable
+
+
+@lru_cache(maxsize=65536)
+def normalize(text: str) -> str:
+    """Casefolded, accents stripped, whitespace collapsed: 'Görbe  Tamás' -> 'gorbe tamas'"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
+def name_key(name: str) -> str:
+    """Same for every order of the name parts: 'Tamás Görbe' -> 'gorbe tamas'"""
+    return " ".join(sorted(normalize(name).split()))
+
+
+def accent_count(text: str) -> int:
+    return sum(1 for c in unicodedata.normalize("NFKD", text) if unicodedata.combining(c))
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, where swapping two neighbouring letters counts as one edit too.
+
+    Returns max_distance + 1, if the distance is larger than max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before_previous: list[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            d = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d = min(d, before_previous[j - 2] + 1)
+            current.append(d)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def deletes(word: str, max_distance: int) -> set[str]:
+    """`word` and every string made by deleting at most max_distance letters of it."""
+    result = {word}
+    edge = {word}
+    for _ in range(max_distance):
+        edge = {w[:i] + w[i + 1 :] for w in edge for i in range(len(w))}
+        result |= edge
+    return result
+
+
+class DeletionIndex:
+    """Strings within an edit distance of `max_distance` (symmetric delete method).
+
+    Two strings within the distance have a common string among their deletes, so a search is
+    max_distance deletes of the query and dict lookups, followed by edit_distance on the few
+    candidates found, instead of comparing to every word.
+    """
+
+    def __init__(self, words: Iterable[str] = (), max_distance: int = 2) -> None:
+        self.max_distance = max_distance
+        self._deletes: dict[str, list[str]] = {}
+        for word in words:
+            for d in deletes(word, max_distance):
+                self._deletes.setdefault(d, []).append(word)
+
+    def candidates(self, word: str) -> set[str]:
+        """The words sharing a delete with `word`: the only ones search() compares to it."""
+        return {c for d in deletes(word, self.max_distance) for c in self._deletes.get(d, ())}
+
+    def search(self, word: str) -> list[tuple[int, str]]:
+        """(distance, word) pairs within max_distance of `word`, closest first."""
+        found = ((edit_distance(word, c, self.max_distance), c) for c in self.candidates(word))
+        return sorted(f for f in found if f[0] <= self.max_distance)
+
+
+def unique_closest(matches: list[tuple[int, str]]) -> str | None:
+    if not matches or (len(matches) > 1 and matches[0][0] == matches[1][0]):
+        return None
+    return matches[0][1]
+
+
+class GivenNames:
+    """Allowed christian names, looked up regardless of accents and case, with typo correction."""
+
+    def __init__(self, names: Iterable[str], max_distance: int = 1) -> None:
+        by_normalized: dict[str, set[str]] = {}
+        for name in names:
+            by_normalized.setdefault(normalize(name), set()).add(name)
+        # only the unambiguous ones: 'Ilona' and 'Ilóna' would both be 'ilona'
+        self.accented = {k: next(iter(v)) for k, v in by_normalized.items() if len(v) == 1}
+        self.ambiguous = frozenset(by_normalized.keys() - self.accented.keys())
+        self.max_distance = max_distance
+        self._index: DeletionIndex | None = None  # only built for the first correct(): most runs don't need it
+
+    def __getstate__(self):
+        # the deletion index is larger than the rest, and quicker to build again than to unpickle
+        return {**self.__dict__, "_index": None}
+
+    def __contains__(self, part: str) -> bool:
+        return normalize(part) in self.accented or normalize(part) in self.ambiguous
+
+    def restore_accents(self, part: str) -> str:
+        """'Tamas' -> 'Tamás', anything else is returned as it is"""
+        return self.accented.get(normalize(part), part)
+
+    def correct(self, part: str) -> str | None:
+        """The allowed name closest to `part`: 'Tamsa' -> 'Tamás'. None, if there is no unique one."""
+        if self._index is None:
+            self._index = DeletionIndex([*self.accented, *self.ambiguous], self.max_distance)
+        closest = unique_closest(self._index.search(normalize(part)))
+        return self.accented.get(closest) if closest else None
+
+
+class NameIndex:
+    """Approximate lookup of full names among the known ones (e.g. the names in the database).
+
+    Names are compared by name_key, so accents, case and the order of the name parts don't
+    matter, and typos up to `max_distance` edits are found.
+    """
+
+    def __init__(self, known_names: Iterable[str], max_distance: int = 2) -> None:
+        self.max_distance = max_distance
+        self.known: dict[str, str] = {}  # name_key -> known name
+        for name in known_names:
+            self.known.setdefault(name_key(name), name)
+        self._index = DeletionIndex(self.known, max_distance)
+        self.lookup = lru_cache(maxsize=4096)(self._lookup)
+
+    def _lookup(self, name: str) -> str | None:
+        """The known name closest to `name`. None, if there is no, or more than one such name."""
+        key = name_key(name)
+        if key in self.known:
+            return self.known[key]
+        closest = unique_closest(self._index.search(key))
+        return self.known[closest] if closest else None
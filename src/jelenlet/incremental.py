@@ -0,0 +1,241 @@
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+from jelenlet.cache import ParseCache, content_hash
+from jelenlet.database import Database
+from jelenlet.errors import ReportError
+from jelenlet.files import atomic_write
+from jelenlet.fixer import fix_name_issues, fix_email_issues, fixed_name_emails, raise_if_issues, NameCounts
+from jelenlet.metrics import span
+from jelenlet.paths import INCREMENTAL_STATE_DIR
+from jelenlet.process import (
+    CsoportType,
+    apply_email_names_database,
+    build_journal,
+    change_emails_in_dataframes,
+    change_names_in_dataframes,
+    construct_collective_dataframe,
+    digest_cache_key,
+    generate_output_filename,
+    list_xlsx_files,
+    read_files,
+    sort_by_name,
+)
+
+# Bump, when the layout of IncrementalState changes: older state files are ignored.
+STATE_VERSION = 4
+
+
+@dataclass
+class FileState:
+    mtime_ns: int
+    size: int
+    sha256: str
+    df: pd.DataFrame | None  # cleaned, before the database overrides. Not saved: it is in the parse cache
+
+    def __getstate__(self):
+        return {**self.__dict__, "df": None}
+
+
+@dataclass
+class IncrementalState:
+    version: int = STATE_VERSION
+    files: dict[str, FileState] = field(default_factory=dict)  # key: file name without folder
+    # fixer inputs and results of the last successful run
+    email_names_db: dict[str, str] = field(default_factory=dict)
+    journal: dict[str, NameCounts] = field(default_factory=dict)  # Journal.email_names
+    email_name: dict[str, str] = field(default_factory=dict)  # result of the name fixer
+    wrong_right_emails: dict[str, str] = field(default_factory=dict)
+    email_names_full: dict[str, str] = field(default_factory=dict)
+    # attendance matrix of the last successful run, before sorting
+    matrix_files: list[str] = field(default_factory=list)
+    matrix: pd.DataFrame | None = None
+
+
+def state_file(folder: Path, level: CsoportType, state_dir: Path | None = None) -> Path:
+    """The state of `folder` under tmp/incremental: the input folder may be shared, e.g. a synced drive."""
+    folder_hash = hashlib.sha256(str(Path(folder).resolve()).encode("utf-8")).hexdigest()[:16]
+    return (state_dir or INCREMENTAL_STATE_DIR) / f"{level}_{folder_hash}.state.pickle"
+
+
+def load_state(path: Path) -> IncrementalState:
+    try:
+        with open(path, mode="rb") as f:
+            state = pickle.load(f)
+    except FileNotFoundError:
+        return IncrementalState()
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+        print(f"[WARNING] Ignoring unreadable state file {path}: {e}")
+        return IncrementalState()
+    if not isinstance(state, IncrementalState) or state.version != STATE_VERSION:
+        print(f"[WARNING] Ignoring state file of an other version: {path}")
+        return IncrementalState()
+    return state
+
+
+def save_state(path: Path, state: IncrementalState):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(path) as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:  # next run will be a full one
+        print(f"[WARNING] Could not save state file {path}: {e}")
+
+
+def ingest_changed_files(
+    file_names: list[str], old_files: dict[str, FileState], workers: int = 1, cache: ParseCache | None = None
+) -> tuple[dict[str, FileState], set[str]]:
+    """Return the state of every file in `file_names` and the names of the ones that changed.
+
+    The dataframes of unchanged files are the ones in memory, or in `cache`. Without either, they are parsed again.
+    """
+    files: dict[str, FileState] = {}
+    changed: set[str] = set()
+    to_read: list[tuple[str, os.stat_result, str]] = []
+    for file_name in file_names:
+        key = os.path.basename(file_name)
+        stat = os.stat(file_name)
+        old = old_files.get(key)
+        if old and old.mtime_ns == stat.st_mtime_ns and old.size == stat.st_size:
+            sha256 = old.sha256
+        else:
+            sha256 = content_hash(file_name)
+            if not (old and old.sha256 == sha256):  # not just touched
+                changed.add(key)
+        df = old.df if old and key not in changed else None
+        if df is None and cache and key not in changed:
+            df = cache.get(digest_cache_key(sha256))
+        if df is None:
+            to_read.append((file_name, stat, sha256))
+        else:
+            files[key] = FileState(stat.st_mtime_ns, stat.st_size, sha256, df)
+
+    print(f"Incremental: {len(file_names) - len(changed)} unchanged, {len(changed)} new or changed file(s).")
+    dfs = read_files([f for f, _, _ in to_read], workers, cache)
+    for (file_name, stat, sha256), df in zip(to_read, dfs):
+        files[os.path.basename(file_name)] = FileState(stat.st_mtime_ns, stat.st_size, sha256, df)
+    return files, changed
+
+
+def extend_collective_dataframe(
+    matrix: pd.DataFrame, file_names: list[str], dfs: list[pd.DataFrame], email_names_full: dict[str, str], level: CsoportType
+) -> pd.DataFrame:
+    """Add the date columns of `file_names` to a previous result of construct_collective_dataframe.
+
+    Only valid, if the files of `matrix` and the email substitutions did not change since it was made.
+    """
+    emails = pd.Index(list(email_names_full), name="Email")
+    # new members did not attend the old rehearsals
+    attendance = matrix.drop(columns=["Név", "Össz."]).reindex(emails, fill_value=0)
+    if file_names:
+        added = construct_collective_dataframe(file_names, dfs, email_names_full, level).drop(columns=["Név", "Össz."])
+        date_columns = sorted(attendance.columns.union(added.columns))  # "%Y.%m.%d" strings sort chronologically
+        attendance = attendance.reindex(columns=date_columns, fill_value=0) | added.reindex(columns=date_columns, fill_value=0)
+
+    new_df = attendance.astype("int8")
+    new_df.insert(0, "Név", list(email_names_full.values()))
+    new_df.insert(1, "Össz.", attendance.to_numpy().sum(axis=1, dtype="int64"))
+    return new_df
+
+
+def process_incremental(
+    folder: Path,
+    db: Database,
+    level: CsoportType,
+    output_dir: Path,
+    workers: int = 1,
+    cache: ParseCache | None = None,
+    state: IncrementalState | None = None,
+    file_names: list[str] | None = None,
+) -> tuple[pd.DataFrame, Path]:
+    """Same result as process(), but reuses the state of the previous run of `folder`.
+
+    Only new or changed files are parsed, the fixers only check the emails and names whose
+    journal entries (or database lines) changed, and when possible, only the new date
+    columns are added to the previous attendance matrix.
+
+    `state`: kept in memory by a long running caller instead of loading it from state_file(), it
+    is updated in place (and saved too).
+    `file_names`: the sheets of `level` in `folder`, if already listed, e.g. by classify_files().
+    """
+    path = state_file(folder, level)
+    state = state if state is not None else load_state(path)
+
+    with span("ingest") as s:
+        file_names = file_names if file_names is not None else list_xlsx_files(folder, level)
+        files, changed = ingest_changed_files(file_names, state.files, workers, cache)
+        s.rows = sum(len(files[os.path.basename(f)].df) for f in file_names)
+    keys = [os.path.basename(f) for f in file_names]
+    removed = set(state.files) - set(keys)
+    state.files = files
+
+    EMAIL_NAMES_DATABASE = db.read_email_name_database()
+    with span("journal") as s:
+        dfs = [files[k].df.copy() for k in keys]
+        apply_email_names_database(dfs, EMAIL_NAMES_DATABASE)
+        journal = build_journal(dfs)
+        email_names = journal.email_names
+        s.rows = len(email_names)
+
+    def entry(email_names: dict[str, NameCounts], email: str) -> list[tuple[str, int]]:
+        return list(email_names.get(email, {}).items())  # order matters: the first name is the default
+
+    old_db, old_journal = state.email_names_db, state.journal
+    affected_emails = {e for e in email_names.keys() | old_journal.keys() if entry(email_names, e) != entry(old_journal, e)}
+    affected_emails |= {e for e in EMAIL_NAMES_DATABASE.keys() | old_db.keys() if EMAIL_NAMES_DATABASE.get(e) != old_db.get(e)}
+    affected_names = {n for e in affected_emails for n in [*email_names.get(e, {}), *old_journal.get(e, {})]}
+    affected_names |= set(EMAIL_NAMES_DATABASE.values()) ^ set(old_db.values())
+    print(f"Incremental: checking {len(affected_emails)} email(s) and {len(affected_names)} name(s).")
+
+    try:
+        with span("fix"):
+            fixed, name_issues = fix_name_issues({e: ns for e, ns in email_names.items() if e in affected_emails}, db)
+            email_name = {e: fixed[e] if e in affected_emails else state.email_name[e] for e in email_names}
+            # the fixed names of the affected emails, before and now
+            affected_names |= {n for e in affected_emails for n in (email_name.get(e), state.email_name.get(e)) if n is not None}
+            print("-------")
+            unresolved = {i.email for i in name_issues if i.suggestion is None}
+            wrong_right_emails, email_names_full, email_issues = fix_email_issues(
+                fixed_name_emails(email_names, email_name, unresolved), email_name, db, affected_names
+            )
+            raise_if_issues(name_issues, email_issues)
+    except ReportError:
+        save_state(path, state)  # keep the parsed files, fixer results stay the ones of the last successful run
+        raise
+    finally:
+        db.flush()  # write the suggestions of the fixers in one go
+    with span("aggregate") as s:
+        change_names_in_dataframes(email_name, dfs)
+        change_emails_in_dataframes(wrong_right_emails, dfs)
+
+        reusable = (
+            state.matrix is not None
+            and not (set(state.matrix_files) & (changed | removed))
+            and wrong_right_emails == state.wrong_right_emails
+        )
+        if reusable:
+            new = [(f, df) for f, k, df in zip(file_names, keys, dfs) if k not in state.matrix_files]
+            df_summary = extend_collective_dataframe(
+                state.matrix, [f for f, _ in new], [df for _, df in new], email_names_full, level
+            )
+        else:
+            df_summary = construct_collective_dataframe(file_names, dfs, email_names_full, level)
+        s.rows = len(df_summary)
+
+    state.email_names_db = dict(EMAIL_NAMES_DATABASE)
+    state.journal = email_names
+    state.email_name = email_name
+    state.wrong_right_emails = wrong_right_emails
+    state.email_names_full = email_names_full
+    state.matrix_files = keys
+    state.matrix = df_summary.copy()
+    save_state(path, state)
+
+    with span("sort_by_name"):
+        sort_by_name(df_summary)
+    return df_summary, generate_output_filename(file_names, level, output_dir)
@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_MAX_JOBS = 2  # reports built at the same time, the rest wait in the queue
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    stage: str  # e.g. "ingest", "journal", "fix", "aggregate", "export"
+    done: int
+    total: int
+
+
+class Job(Generic[T]):
+    """A report generation running in the background, with its progress events."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._events: list[ProgressEvent] = []
+        self.future: Future[T] = Future()
+
+    def report(self, stage: str, done: int, total: int):
+        """A ProgressCallback, called from the worker thread."""
+        with self._lock:
+            self._events.append(ProgressEvent(stage, done, total))
+
+    @property
+    def events(self) -> list[ProgressEvent]:
+        with self._lock:
+            return list(self._events)
+
+    @property
+    def latest(self) -> ProgressEvent | None:
+        """None, while the job waits for a free worker."""
+        with self._lock:
+            return self._events[-1] if self._events else None
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self) -> T:
+        """The return value of the job, or raises its exception."""
+        return self.future.result()
+
+
+class JobRunner:
+    """Runs jobs in a thread pool of `max_jobs` threads, shared by every web session.
+
+    Jobs over the limit wait in the queue, so many uploads at once don't run out of CPU or memory.
+    """
+
+    def __init__(self, max_jobs: int = DEFAULT_MAX_JOBS) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="jelenlet-job")
+
+    def submit(self, fn: Callable[[Job[T]], T]) -> Job[T]:
+        """Run `fn(job)` in the background: `fn` reports its progress with job.report."""
+        job: Job[T] = Job()
+        job.future = self._executor.submit(fn, job)
+        return job
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
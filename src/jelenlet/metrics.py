@@ -0,0 +1,119 @@
+"""Named spans of the report pipeline: wall time, row counts and, optionally, peak memory.
+
+Off unless collected: span() then returns a shared no-op span, so the instrumented code only pays a
+context variable lookup.
+
+    with collect_metrics(peak_memory=True) as metrics:
+        process(...)
+    print(metrics.summary())
+
+Finished spans are logged to the "jelenlet.metrics" logger at DEBUG level, the summary at INFO level.
+Peak memory is traced with tracemalloc, which slows down the measured code, and is process wide:
+reports built at the same time in one process share it.
+"""
+
+import contextlib
+import json
+import logging
+import time
+import tracemalloc
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+MB = 2**20
+
+
+@dataclass
+class Span:
+    name: str
+    depth: int = 0  # nesting level, 0: a stage
+    seconds: float = 0.0
+    rows: int | None = None
+    peak_mb: float | None = None  # allocated at the peak of the span, above what was allocated when it started
+
+
+class Metrics:
+    def __init__(self, peak_memory: bool = False) -> None:
+        self.peak_memory = peak_memory
+        self.spans: list[Span] = []  # in order of start
+        self._depth = 0
+        self._peaks: list[int] = []  # highest traced peak of the open spans, reset_peak() is global
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        s = Span(name, self._depth)
+        self.spans.append(s)
+        self._depth += 1
+        if self.peak_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+        start = time.perf_counter()
+        try:
+            yield s
+        finally:
+            s.seconds = time.perf_counter() - start
+            self._depth -= 1
+            if self.peak_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, self._peaks.pop())
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                s.peak_mb = (peak - current) / MB
+            logger.debug("%s: %.4f s, rows: %s, peak MB: %s", name, s.seconds, s.rows, s.peak_mb)
+
+    def record(self, name: str, seconds: float, rows: int | None = None):
+        """A span measured elsewhere, e.g. in a worker process."""
+        s = Span(name, self._depth, seconds, rows)
+        self.spans.append(s)
+        logger.debug("%s: %.4f s, rows: %s", name, seconds, rows)
+
+    def summary(self) -> str:
+        names = ["  " * s.depth + s.name for s in self.spans]
+        width = max(map(len, names), default=0)
+        lines = [f"{'span':{width}} {'seconds':>9} {'rows':>8} {'peak MB':>9}"]
+        for name, s in zip(names, self.spans):
+            rows = "" if s.rows is None else s.rows
+            peak = "" if s.peak_mb is None else f"{s.peak_mb:.2f}"
+            lines.append(f"{name:{width}} {s.seconds:9.4f} {rows:>8} {peak:>9}")
+        return "\n".join(lines)
+
+    def to_json(self, path: Path):
+        Path(path).write_text(json.dumps([asdict(s) for s in self.spans], indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+_current: ContextVar[Metrics | None] = ContextVar("jelenlet_metrics", default=None)
+_NO_SPAN = contextlib.nullcontext(Span(""))  # rows set on it are dropped
+
+
+def span(name: str) -> contextlib.AbstractContextManager[Span]:
+    """`with span("stage") as s: ...; s.rows = n` - measured only inside collect_metrics()."""
+    metrics = _current.get()
+    return _NO_SPAN if metrics is None else metrics.span(name)
+
+
+def current_metrics() -> Metrics | None:
+    return _current.get()
+
+
+@contextlib.contextmanager
+def collect_metrics(peak_memory: bool = False) -> Iterator[Metrics]:
+    """Collect the spans of the current thread (or task) into a new Metrics."""
+    metrics = Metrics(peak_memory)
+    token = _current.set(metrics)
+    started = peak_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+        if started:
+            tracemalloc.stop()
+        logger.info("Metrics:\n%s", metrics.summary())
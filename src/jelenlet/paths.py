@@ -5,3 +5,8 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = PROJECT_ROOT / "data"
 CONFIG_DIR = PROJECT_ROOT / "config"
 POSSIBLE_NAMES_CSV = DATA_DIR / "anyakonyvezheto_utonevek_2019_08.csv"
+TMP_DIR = PROJECT_ROOT / "tmp"
+PARSE_CACHE_DIR = TMP_DIR / "parse_cache"
+INCREMENTAL_STATE_DIR = TMP_DIR / "incremental"
+ALLOWED_NAMES_INDEX = TMP_DIR / "allowed_names.index.pickle"
+ARCHIVE_DIR = DATA_DIR / "archive"
@@ -1,18 +1,37 @@
 import re
 import datetime
-import locale
 
-from collections import defaultdict
+from dataclasses import dataclass
+from io import BytesIO
+import openpyxl
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import os
-from typing import Literal
+import sys
+import time
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Literal, Mapping
 
 from jelenlet.errors import ReportError
-from jelenlet.fixer import try_fix_name_issues, try_fix_email_issues, name_to_dummy_email
+from jelenlet.fixer import fix_name_issues, fix_email_issues, fixed_name_emails, raise_if_issues, name_to_dummy_email, NameCounts
 from jelenlet.database import Database
+from jelenlet.cache import ParseCache, content_hash, data_hash
+from jelenlet.metrics import current_metrics, span
+from jelenlet.collation import hungarian_sort_key
 
 CsoportType = Literal["kezdo", "kozep", "halado", "egyeb"]
+LEVELS: list[CsoportType] = ["kezdo", "kozep", "halado", "egyeb"]
+
+# progress(stage, done, total): called when a stage starts (done=0) and when it, or one of its files, is done
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def no_progress(stage: str, done: int, total: int):
+    pass
+
 
 # Constants
 EMAIL = "E-mail-cím"  # column names in the xlsx files
@@ -32,134 +51,457 @@ XLSX_FILENAME_DATE_PATTERNS = {
 # Example file name: 'Középhaladós próba - 2024. 09. 09. (válaszok).xlsx'
 
 
-def check__alternative_column_names(file_name: str, df: pd.DataFrame):
-    EMAIL_ALTERNATIVES = ["Email Address", "Email", "E-mail", "e-mail:", "Email Address:", "Email:", "E-mail:", "e-mail:"]
-    if EMAIL not in df.columns:
-        for col in EMAIL_ALTERNATIVES:
-            if col in df.columns:
-                df[EMAIL] = df[col]
-                break
-    NAME_ALTERNATIVES = ["teljes név", "Name", "Full name", "Teljes név:", "Name:", "Full name:"]
-    if NAME not in df.columns:
-        for col in NAME_ALTERNATIVES:
-            if col in df.columns:
-                df[NAME] = df[col]
+EMAIL_ALTERNATIVES = ["Email Address", "Email", "E-mail", "e-mail:", "Email Address:", "Email:", "E-mail:", "e-mail:"]
+NAME_ALTERNATIVES = ["teljes név", "Name", "Full name", "Teljes név:", "Name:", "Full name:"]
+
+# Cell values read as NaN, same as the default `na_values` of pd.read_excel
+NA_VALUES = frozenset(
+    ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+)
+
+
+@dataclass(frozen=True)
+class UploadedFile:
+    """An xlsx file in memory, e.g. uploaded in the web app, or a member of an uploaded zip."""
+
+    name: str
+    data: bytes
+
+
+Source = str | UploadedFile  # a path, or a file in memory
+
+
+def source_name(source: Source) -> str:
+    return source.name if isinstance(source, UploadedFile) else source
+
+
+def extract_xls(zip_file) -> list[UploadedFile]:
+    """The xlsx files of a zip (path or binary file), in memory."""
+    extracted_files: list[UploadedFile] = []
+    with zipfile.ZipFile(zip_file) as zf:
+        for info in zf.infolist():
+            name = info.filename
+            if not info.flag_bits & 0x800:  # not flagged UTF-8, but zip tools of Linux and macOS write UTF-8 names so
+                try:
+                    name = name.encode("cp437").decode("utf-8")
+                except UnicodeError:
+                    pass
+            if not name.lower().endswith(".xlsx"):
+                continue
+            extracted_files.append(UploadedFile(Path(name).name, zf.read(info)))  # without the folders in the zip
+    return extracted_files
+
+
+# Bump, when check__alternative_column_names or the cleanup in read_xlsx changes: invalidates the parse cache.
+COLUMN_RULES_VERSION = 2
+
+
+def check__alternative_column_names(file_name: str, header: list) -> dict[str, int]:
+    """Map the EMAIL, NAME and (optional) JOSSZ columns to their index in the header row."""
+    columns: dict[str, int] = {}
+    for column, alternatives in ((EMAIL, EMAIL_ALTERNATIVES), (NAME, NAME_ALTERNATIVES), (JOSSZ, [])):
+        for col in [column] + alternatives:
+            if col in header:
+                columns[column] = header.index(col)  # the first one, duplicated columns are ignored
                 break
 
-    if EMAIL in df.columns and NAME in df.columns and sum(1 for c in df.columns if c == NAME) == 1:
-        pass
+    if EMAIL in columns and NAME in columns:
+        return columns
+    raise ReportError(
+        f"{file_name} format was not proper. XLSX file needs 1 email column called '{EMAIL}', 1 name column called '{NAME}' only "
+        + f"{header}"
+    )
+
+
+def _cell_value(value):
+    if value is None:
+        return float("nan")
+    if isinstance(value, str):
+        return float("nan") if value in NA_VALUES else sys.intern(value)
+    return value
+
+
+def read_xlsx_columns(source: Source) -> pd.DataFrame:
+    """Stream the first sheet of the workbook, keeping only the columns the pipeline uses."""
+    file = BytesIO(source.data) if isinstance(source, UploadedFile) else source
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        columns = check__alternative_column_names(source_name(source), header)
+        data: dict[str, list] = {column: [] for column in columns}
+        last_non_empty = 0
+        for row in rows:
+            for column, idx in columns.items():
+                data[column].append(_cell_value(row[idx] if idx < len(row) else None))
+            if any(v is not None and v != "" for v in row):
+                last_non_empty = len(data[EMAIL])
+    finally:
+        wb.close()
+    # like pd.read_excel: trailing empty rows are dropped, empty rows in the middle are kept
+    return pd.DataFrame({column: pd.Series(values[:last_non_empty], dtype=object) for column, values in data.items()})
+
+
+def read_xlsx(source: Source) -> pd.DataFrame:
+    """Parse one sign-up sheet and return only the columns the pipeline uses.
+
+    Runs in worker processes too, so it must stay a module level function.
+    """
+    df = read_xlsx_columns(source)
+    file_name = source_name(source)
+    # strip empty spaces and check NaN emails
+    df[EMAIL] = df[EMAIL].str.strip()
+    df[NAME] = df[NAME].str.strip()
+    # check for Nan names
+    nan_mask = df[NAME].isna()
+    if nan_mask.any():
+        print(f"[WARNING] NaN - empty names found in file: {file_name}")
+        df[NAME] = df[NAME].fillna("ISMERETLEN")
+    # check for NaN email addresses
+    nan_mask = df[EMAIL].isna()
+    if nan_mask.any():
+        names_with_nan_email = df.loc[nan_mask, NAME].dropna().unique().tolist()
+        print(f"[WARNING] NaN email address(es) found in file: {file_name} Names: {names_with_nan_email}")
+    # fill NaN emails with generated dummy emails
+    df.loc[nan_mask, EMAIL] = df.loc[nan_mask, NAME].apply(name_to_dummy_email)
+    return df
+
+
+def read_xlsx_timed(source: Source) -> tuple[pd.DataFrame, float]:
+    """read_xlsx() and its duration, measured in the worker process."""
+    start = time.perf_counter()
+    df = read_xlsx(source)
+    return df, time.perf_counter() - start
+
+
+def cache_key(source: Source) -> str:
+    return digest_cache_key(data_hash(source.data) if isinstance(source, UploadedFile) else content_hash(source))
+
+
+def digest_cache_key(sha256: str) -> str:
+    """The ParseCache key of a file with this content hash"""
+    return f"{sha256}_r{COLUMN_RULES_VERSION}"
+
+
+def list_xlsx_files(folder: Path, level: CsoportType) -> list[str]:
+    file_names: list[str] = [os.path.join(folder, f) for f in os.listdir(folder) if XLSX_FILENAME_DATE_PATTERNS[level].match(f)]
+    print(f"Found {len(file_names)} files.")
+    if not file_names:
+        raise ReportError(f"Did not found xlsx files matching the pattern: {XLSX_FILENAME_DATE_PATTERNS[level]}")
+    return file_names
+
+
+def list_sources(folder: Path | list[UploadedFile], level: CsoportType) -> list[Source]:
+    """The xlsx files of `level` in a folder, or among files in memory."""
+    if not isinstance(folder, list):
+        return list_xlsx_files(folder, level)
+    files = [f for f in folder if XLSX_FILENAME_DATE_PATTERNS[level].match(Path(f.name).name)]
+    print(f"Found {len(files)} files.")
+    if not files:
+        raise ReportError(f"Did not found xlsx files matching the pattern: {XLSX_FILENAME_DATE_PATTERNS[level]}")
+    return files
+
+
+def read_files(
+    file_names: list[Source], workers: int = 1, cache: ParseCache | None = None, progress: ProgressCallback = no_progress
+) -> list[pd.DataFrame]:
+    """Parse `file_names` (paths or files in memory) into cleaned dataframes, in the same order.
+
+    With `workers` > 1 the files are parsed in a process pool, 0 means one worker per CPU.
+    Files already in `cache` are not parsed again. `progress` gets an "ingest" event per parsed file.
+    """
+    keys = [cache_key(f) for f in file_names] if cache else []
+    cached = [cache.get(k) for k in keys] if cache else [None for _ in file_names]
+    to_parse = [f for f, df in zip(file_names, cached) if df is None]
+    if cache:
+        print(f"Parse cache: {len(file_names) - len(to_parse)} hit(s), {len(to_parse)} miss(es).")
+
+    workers = workers or os.cpu_count() or 1
+    progress("ingest", len(file_names) - len(to_parse), len(file_names))
+    parsed: list[pd.DataFrame] = []
+    if workers > 1 and len(to_parse) > 1:
+        # spawn: fork is unsafe from the multi-threaded streamlit server
+        spawn = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(to_parse)), mp_context=spawn) as executor:
+            metrics = current_metrics()
+            for f, (df, seconds) in zip(to_parse, executor.map(read_xlsx_timed, to_parse)):
+                if metrics:
+                    metrics.record(f"parse {Path(source_name(f)).name}", seconds, len(df))
+                parsed.append(df)
+                progress("ingest", len(file_names) - len(to_parse) + len(parsed), len(file_names))
     else:
-        raise ReportError(
-            f"{file_name} format was not proper. XLSX file needs 1 email column called '{EMAIL}', 1 name column called '{NAME}' only "
-            + f"{df.columns}"
-        )
-
-
-def process(folder: Path, db: Database, level: CsoportType, output_dir: Path) -> tuple[pd.DataFrame, Path]:
-
-    EMAIL_NAMES_DATABASE = db.read_email_name_database()
-
-    def read_dataframes() -> tuple[list[pd.DataFrame], list[str]]:
-        file_names: list[str] = [os.path.join(folder, f) for f in os.listdir(folder) if XLSX_FILENAME_DATE_PATTERNS[level].match(f)]
-        print(f"Found {len(file_names)} files.")
-        if not file_names:
-            raise ReportError(f"Did not found xlsx files matching the pattern: {XLSX_FILENAME_DATE_PATTERNS[level]}")
-
-        dfs = [pd.read_excel(f) for f in file_names]
-        # strip empty spaces and check NaN emails
-        for df, file_name in zip(dfs, file_names):
-            check__alternative_column_names(file_name, df)
-            df[EMAIL] = df[EMAIL].str.strip()
-            df[NAME] = df[NAME].str.strip()
-            # check for Nan names
-            nan_mask = df[NAME].isna()
-            if nan_mask.any():
-                print(f"[WARNING] NaN - empty names found in file: {file_name}")
-                df[NAME].fillna("ISMERETLEN", inplace=True)
-            # check for NaN email addresses
-            nan_mask = df[EMAIL].isna()
-            if nan_mask.any():
-                names_with_nan_email = df.loc[nan_mask, NAME].dropna().unique().tolist()
-                print(f"[WARNING] NaN email address(es) found in file: {file_name} Names: {names_with_nan_email}")
-            # fill NaN emails with generated dummy emails
-            df.loc[nan_mask, EMAIL] = df.loc[nan_mask, NAME].apply(name_to_dummy_email)
-
-            df[NAME] = df[EMAIL].map(EMAIL_NAMES_DATABASE).fillna(df[NAME])
-        return dfs, file_names
-
-    def build_journal(dataframes: list[pd.DataFrame]) -> defaultdict[str, list[str]]:
-        email_names = defaultdict(list)
-        for df in dataframes:
-            for email, name in zip(df[EMAIL].to_numpy(), df[NAME].to_numpy()):
-                # if name not in email_names[email]:
-                email_names[email].append(name)
-        return email_names
-
-    def change_names_in_dataframes(email_name: dict[str, str], dfs: list[pd.DataFrame]):
-        for df in dfs:
-            df[NAME] = df[EMAIL].map(email_name).fillna(df[NAME])
-
-    def change_emails_in_dataframes(wrong_right_emails, dfs):
-        for df in dfs:
-            df[EMAIL] = df[EMAIL].map(wrong_right_emails).fillna(df[EMAIL])
-
-    def cleanup_dataframes(db: Database):
-        dfs, file_names = read_dataframes()
-        # try to catch name typos:
-        email_names = build_journal(dfs)
-        email_name = try_fix_name_issues(email_names, db)
-        print("-------")
-        change_names_in_dataframes(email_name, dfs)  # Use email_names dict to fill up dataframes
-        # try to catch email typos
-        wrong_right_emails, email_name = try_fix_email_issues(email_names, email_name, db)
-        change_emails_in_dataframes(wrong_right_emails, dfs)
-        return dfs, file_names, email_name
-
-    # r"D:/workspaces/jupyter_notebooks/kozephalados_jelenleti/data/2025_26_osz\Középhaladós próba - 2025. 09. 29. (válaszok).xlsx"
-    def find_date(path: str) -> datetime.date:
-        return find_date_by_pattern(path, XLSX_FILENAME_DATE_PATTERNS[level])
-
-    def construct_collective_dataframe(file_names: list[str], dfs: list[pd.DataFrame], email_names_full: dict[str, str]):
-        warn_if_same_dates_in_file_names(file_names)
-
-        emails, names = list(zip(*email_names_full.items()))
-        emails = list(emails)
-        names = list(names)
-        email_attendance_count = defaultdict(int)
-
-        data: dict[str | datetime.date, list] = {"Név": names}
-        data["Össz."] = [0 for _ in emails]  # add summary column before - to make this the 3rd column.
-
-        pairs = sorted(zip(file_names, dfs), key=lambda p: find_date(p[0]))
-        for file_name, df in pairs:
-            event_date = find_date(file_name)
-            if JOSSZ in df.columns:
-                df = df[df[JOSSZ].str.lower() != "nem"]  # Filter out, "Jössz próbára?" -> Nem rows
-            emails_of_attendees = set(df[EMAIL].to_numpy())
-            data[event_date.strftime("%Y.%m.%d")] = ["X" if email in emails_of_attendees else "_" for email in emails]
-
-            for email in emails_of_attendees:
-                email_attendance_count[email] += 1
-
-        data["Össz."] = [email_attendance_count[email] for email in emails]
-
-        new_df = pd.DataFrame(data, index=emails)
-        new_df.index.name = "Email"
-        return new_df
-
-    def warn_if_same_dates_in_file_names(file_names: list[str]):
-        # warn if multiple files have the same date in their name.
-        dates = [find_date(f) for f in file_names]
-        if len(dates) > len(set(dates)):
-            print("Warning: Multiple files with the same date in their name!")
-
-    dfs, file_names, email_names_full = cleanup_dataframes(db)
-    df_summary = construct_collective_dataframe(file_names, dfs, email_names_full)
-    # trying to fix order problem with hungarian accented letters
-    locale.setlocale(locale.LC_COLLATE, "hu_HU.UTF-8")
-    # df_summary.sort_values(by=['Név'], inplace=True)
-    df_summary.sort_values(by="Név", key=lambda s: s.map(locale.strxfrm), inplace=True)
-    return df_summary, generate_output_filename(file_names, level, output_dir)
+        for f in to_parse:
+            with span(f"parse {Path(source_name(f)).name}") as s:
+                parsed.append(read_xlsx(f))
+                s.rows = len(parsed[-1])
+            progress("ingest", len(file_names) - len(to_parse) + len(parsed), len(file_names))
+
+    parsed_iter = iter(parsed)
+    dfs: list[pd.DataFrame] = [df if df is not None else next(parsed_iter) for df in cached]
+    if cache:
+        for key, df, hit in zip(keys, dfs, cached):
+            if hit is None:
+                cache.put(key, df)
+        cache.evict()
+    return dfs
+
+
+def apply_email_names_database(dfs: list[pd.DataFrame], email_names_db: Mapping[str, str]):
+    for df in dfs:
+        df[NAME] = df[EMAIL].map(email_names_db).fillna(df[NAME])
+
+
+@dataclass
+class Ingested:
+    file_names: list[str]
+    dfs: list[pd.DataFrame]  # cleaned, before the database overrides
+
+
+def ingest(
+    folder: Path | list[UploadedFile],
+    level: CsoportType,
+    workers: int = 1,
+    cache: ParseCache | None = None,
+    progress: ProgressCallback = no_progress,
+) -> Ingested:
+    """Stage 1: read every sheet of `level` in `folder`, or among the files in memory."""
+    with span("ingest") as s:
+        sources = list_sources(folder, level)
+        ingested = Ingested([source_name(f) for f in sources], read_files(sources, workers, cache, progress))
+        s.rows = sum(len(df) for df in ingested.dfs)
+    return ingested
+
+
+def classify_files(folder: Path) -> dict[CsoportType, list[str]]:
+    """The xlsx files of every level in `folder`, listing it once.
+
+    A file belongs to the first named level whose pattern matches it; "egyeb" gets the rest of the
+    dated files (on its own, the "egyeb" pattern matches the files of the named levels too).
+    """
+    levels: dict[CsoportType, list[str]] = {level: [] for level in LEVELS}
+    for f in os.listdir(folder):
+        level = next((lvl for lvl in LEVELS if XLSX_FILENAME_DATE_PATTERNS[lvl].match(f)), None)
+        if level:
+            levels[level].append(os.path.join(folder, f))
+    print("Found files: " + ", ".join(f"{level}: {len(files)}" for level, files in levels.items()))
+    return {level: files for level, files in levels.items() if files}
+
+
+def ingest_levels(
+    folder: Path, workers: int = 1, cache: ParseCache | None = None, progress: ProgressCallback = no_progress
+) -> dict[CsoportType, Ingested]:
+    """ingest() of every level in `folder`, with the files of all levels parsed in one pool."""
+    levels = classify_files(folder)
+    if not levels:
+        raise ReportError(f"Did not found xlsx files matching any of the patterns: {list(XLSX_FILENAME_DATE_PATTERNS.values())}")
+    file_names = [f for files in levels.values() for f in files]
+    dfs = iter(read_files(file_names, workers, cache, progress))
+    return {level: Ingested(files, [next(dfs) for _ in files]) for level, files in levels.items()}
+
+
+def read_dataframes(
+    folder: Path | list[UploadedFile],
+    level: CsoportType,
+    email_names_db: Mapping[str, str],
+    workers: int = 1,
+    cache: ParseCache | None = None,
+) -> tuple[list[pd.DataFrame], list[str]]:
+    """Read every sheet of `level` in `folder`, with names overridden from the database."""
+    ingested = ingest(folder, level, workers, cache)
+    apply_email_names_database(ingested.dfs, email_names_db)
+    return ingested.dfs, ingested.file_names
+
+
+@dataclass
+class Journal:
+    """Distinct names per email, with their occurrence counts."""
+
+    email_names: dict[str, NameCounts]  # emails and names in order of first occurrence
+
+
+def build_journal(dataframes: list[pd.DataFrame]) -> Journal:
+    rows = pd.concat([df[[EMAIL, NAME]] for df in dataframes], ignore_index=True)
+    # one row per distinct (email, name) pair, in order of first occurrence
+    pairs = rows.groupby([EMAIL, NAME], sort=False, dropna=False).size()
+    emails = pairs.index.get_level_values(EMAIL).to_numpy()
+    names = pairs.index.get_level_values(NAME).to_numpy()
+    counts = pairs.to_numpy().tolist()
+
+    email_names: dict[str, NameCounts] = {}
+    for email, name, count in zip(emails, names, counts):
+        email_names.setdefault(email, {})[name] = count
+    return Journal(email_names)
+
+
+def change_names_in_dataframes(email_name: dict[str, str], dfs: list[pd.DataFrame]):
+    for df in dfs:
+        df[NAME] = df[EMAIL].map(email_name).fillna(df[NAME])
+
+
+def change_emails_in_dataframes(wrong_right_emails, dfs):
+    for df in dfs:
+        df[EMAIL] = df[EMAIL].map(wrong_right_emails).fillna(df[EMAIL])
+
+
+def find_dates(file_names: list[str], level: CsoportType) -> list[datetime.date]:
+    pattern = XLSX_FILENAME_DATE_PATTERNS[level]
+    return [find_date_by_pattern(f, pattern) for f in file_names]
+
+
+def construct_collective_dataframe(
+    file_names: list[str], dfs: list[pd.DataFrame], email_names_full: dict[str, str], level: CsoportType
+) -> pd.DataFrame:
+    """Email x rehearsal date attendance matrix: 1 (int8) if attended, the "Össz." column is the row sum.
+
+    Files with the same date are merged into one date column.
+    """
+    dates = find_dates(file_names, level)
+    warn_if_same_dates(dates)
+
+    emails = pd.Index(list(email_names_full), name="Email")
+    date_columns = sorted(set(dates))
+
+    attendance = []
+    for date, df in zip(dates, dfs):
+        if JOSSZ in df.columns:
+            df = df[df[JOSSZ].str.lower() != "nem"]  # Filter out, "Jössz próbára?" -> Nem rows
+        attendance.append(pd.DataFrame({EMAIL: df[EMAIL].to_numpy(), "date": date}))
+    rows = pd.concat(attendance, ignore_index=True)
+
+    # categorical codes of both axes, then one scatter into the matrix
+    email_codes = emails.get_indexer(rows[EMAIL])
+    date_codes = pd.Index(date_columns).get_indexer(rows["date"])
+    known = email_codes >= 0  # -1: not in email_names_full
+    matrix = np.zeros((len(emails), len(date_columns)), dtype=np.int8)
+    matrix[email_codes[known], date_codes[known]] = 1
+
+    new_df = pd.DataFrame(matrix, index=emails, columns=[d.strftime("%Y.%m.%d") for d in date_columns])
+    new_df.insert(0, "Név", list(email_names_full.values()))
+    new_df.insert(1, "Össz.", matrix.sum(axis=1, dtype=np.int64))  # 3rd column, after reset_index
+    return new_df
+
+
+def has_same_dates(dates: list[datetime.date]) -> bool:
+    return len(dates) > len(set(dates))
+
+
+def warn_if_same_dates(dates: list[datetime.date]):
+    # warn if multiple files have the same date in their name.
+    if has_same_dates(dates):
+        print("Warning: Multiple files with the same date in their name!")
+
+
+def sort_by_name(df_summary: pd.DataFrame):
+    # Hungarian alphabetical order, without locale.setlocale: it is process-global, and hu_HU may be missing
+    df_summary.sort_values(by="Név", key=lambda s: s.map(hungarian_sort_key, na_action="ignore"), kind="stable", inplace=True)
+
+
+@dataclass
+class Fixes:
+    email_name: dict[str, str]  # result of the name fixer
+    wrong_right_emails: dict[str, str]
+    email_names_full: dict[str, str]  # result of the email fixer, the rows of the summary
+
+
+def journal_stage(ingested: Ingested, email_names_db: Mapping[str, str]) -> tuple[list[pd.DataFrame], Journal]:
+    """Stage 2: copies of the ingested dataframes with names overridden from the database, and their journal."""
+    with span("journal") as s:
+        dfs = [df.copy() for df in ingested.dfs]
+        apply_email_names_database(dfs, email_names_db)
+        journal = build_journal(dfs)
+        s.rows = len(journal.email_names)  # distinct emails
+    return dfs, journal
+
+
+def fix(journal: Journal, db: Database) -> Fixes:
+    """Stage 3: name and email fixes. Raises ReportError after writing every issue to `db`."""
+    try:
+        with span("fix"):
+            # try to catch name typos:
+            with span("fix names") as s:
+                email_name, name_issues = fix_name_issues(journal.email_names, db)
+                s.rows = len(name_issues)  # issues found
+            print("-------")
+            # try to catch email typos, even if there were name issues: one run reports all of them
+            with span("fix emails") as s:
+                unresolved = {i.email for i in name_issues if i.suggestion is None}
+                name_emails = fixed_name_emails(journal.email_names, email_name, unresolved)  # by the suggested names too
+                wrong_right_emails, email_names_full, email_issues = fix_email_issues(name_emails, email_name, db)
+                s.rows = len(email_issues)
+            raise_if_issues(name_issues, email_issues)
+    finally:
+        db.flush()  # write the suggestions of the fixers in one go
+    return Fixes(email_name, wrong_right_emails, email_names_full)
+
+
+def aggregate(file_names: list[str], dfs: list[pd.DataFrame], fixes: Fixes, level: CsoportType) -> pd.DataFrame:
+    """Stage 4: the sorted summary. Modifies `dfs`."""
+    with span("aggregate") as s:
+        change_names_in_dataframes(fixes.email_name, dfs)  # Use email_names dict to fill up dataframes
+        change_emails_in_dataframes(fixes.wrong_right_emails, dfs)
+        with span("construct_collective_dataframe"):
+            df_summary = construct_collective_dataframe(file_names, dfs, fixes.email_names_full, level)
+        with span("sort_by_name"):
+            sort_by_name(df_summary)
+        s.rows = len(df_summary)
+    return df_summary
+
+
+class ReportPipeline:
+    """The stages of process(), keeping the results that don't depend on the database.
+
+    The ingested sheets are read once; the journal is only rebuilt when the email - name pairs of
+    the database changed. So after fixing the database, a new run only costs the fixers and the
+    aggregation.
+    """
+
+    def __init__(
+        self,
+        folder: Path | list[UploadedFile],
+        level: CsoportType,
+        workers: int = 1,
+        cache: ParseCache | None = None,
+        ingested: Ingested | None = None,
+    ) -> None:
+        """`ingested`: the already read sheets of `level`, e.g. from ingest_levels()"""
+        self.folder = folder
+        self.level = level
+        self.workers = workers
+        self.cache = cache
+        self._ingested: Ingested | None = ingested
+        self._journal_db: dict[str, str] | None = None  # database content of _journal
+        self._journal: tuple[list[pd.DataFrame], Journal] | None = None
+
+    def ingested(self, progress: ProgressCallback = no_progress) -> Ingested:
+        if self._ingested is None:
+            self._ingested = ingest(self.folder, self.level, self.workers, self.cache, progress)
+        return self._ingested
+
+    def journal(self, email_names_db: Mapping[str, str], progress: ProgressCallback = no_progress) -> tuple[list[pd.DataFrame], Journal]:
+        ingested = self.ingested(progress)
+        if self._journal is None or self._journal_db != email_names_db:
+            progress("journal", 0, 1)
+            self._journal = journal_stage(ingested, email_names_db)
+            self._journal_db = dict(email_names_db)
+        progress("journal", 1, 1)
+        return self._journal
+
+    def run(self, db: Database, output_dir: Path, progress: ProgressCallback = no_progress) -> tuple[pd.DataFrame, Path]:
+        dfs, journal = self.journal(db.read_email_name_database(), progress)
+        progress("fix", 0, 1)
+        fixes = fix(journal, db)
+        progress("fix", 1, 1)
+        progress("aggregate", 0, 1)
+        file_names = self.ingested().file_names
+        df_summary = aggregate(file_names, [df.copy() for df in dfs], fixes, self.level)
+        progress("aggregate", 1, 1)
+        return df_summary, generate_output_filename(file_names, self.level, output_dir)
+
+
+def process(
+    folder: Path | list[UploadedFile], db: Database, level: CsoportType, output_dir: Path, workers: int = 1, cache: ParseCache | None = None
+) -> tuple[pd.DataFrame, Path]:
+    return ReportPipeline(folder, level, workers, cache).run(db, output_dir)
 
 
 def generate_output_filename(file_names: list[str], level, dir: Path) -> Path:
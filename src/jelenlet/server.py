@@ -0,0 +1,245 @@
+"""Local HTTP service for building reports from scripts: no Streamlit, no interpreter start per report.
+
+    uv run jelenlet-server --port 8556
+    curl -F level=kozep -F files=@sheet1.xlsx -F files=@sheet2.xlsx http://localhost:8556/reports -o report.xlsx
+    curl --data-binary @season.zip "http://localhost:8556/reports?level=kozep" -o report.xlsx
+
+POST /reports: multipart/form-data with xlsx and / or zip files and a level field, or a zip as the body
+with ?level=. Responses:
+    200: the xlsx report
+    409: JSON {"error", "name_issues", "email_issues"}: the issues, also added to the database of the level
+    400, 422: JSON {"error"}: a bad request, or the report could not be built from the files
+    500: JSON {"error"}: a bug, the traceback is printed by the server
+
+The reports are built on a pool of threads started with the modules and the allowed names index loaded.
+The databases are the sqlite ones of the web app (tmp/<level>.database.sqlite); reports of the same
+level are built one after the other, as the fixers read and write the database of the level.
+"""
+
+import argparse
+import asyncio
+import json
+import traceback
+import urllib.parse
+import zipfile
+from dataclasses import asdict, dataclass
+from email.parser import BytesParser
+from email.policy import HTTP
+from http import HTTPStatus
+from io import BytesIO
+from pathlib import Path
+
+from jelenlet.cache import ParseCache
+from jelenlet.database import SqliteDatabase
+from jelenlet.errors import IssuesError, ReportError
+from jelenlet.excel_export import to_excel
+from jelenlet.fixer.name_fixer import allowed_names_index
+from jelenlet.jobs import DEFAULT_MAX_JOBS, Job, JobRunner
+from jelenlet.paths import PARSE_CACHE_DIR, TMP_DIR
+from jelenlet.process import LEVELS, CsoportType, UploadedFile, extract_xls, process
+
+MAX_BODY = 256 * 2**20  # bytes of an upload
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: dict[str, list[str]]
+    headers: dict[str, str]  # lowercase names
+    body: bytes
+
+
+async def read_request(reader: asyncio.StreamReader) -> Request | None:
+    """None, if the client closed the connection without a request."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+    headers: dict[str, str] = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", ""):
+        raise HttpError(HTTPStatus.LENGTH_REQUIRED, "Send the body with a Content-Length")
+    length = int(headers.get("content-length", "0") or 0)
+    if length > MAX_BODY:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"The upload is larger than {MAX_BODY // 2**20} MB")
+    body = await reader.readexactly(length)
+    url = urllib.parse.urlsplit(target)
+    return Request(method.upper(), url.path, urllib.parse.parse_qs(url.query), headers, body)
+
+
+async def write_response(
+    writer: asyncio.StreamWriter, status: HTTPStatus, body: bytes, content_type: str, headers: dict[str, str] | None = None
+):
+    head = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}", f"Content-Length: {len(body)}"]
+    head += [f"{name}: {value}" for name, value in (headers or {}).items()] + ["Connection: close", "", ""]
+    writer.write("\r\n".join(head).encode("latin-1") + body)
+    await writer.drain()
+
+
+def json_body(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, indent=1).encode("utf-8")
+
+
+def read_upload(file_name: str, data: bytes) -> list[UploadedFile]:
+    """The xlsx files of an uploaded xlsx or zip file."""
+    if file_name.lower().endswith(".zip"):
+        return extract_xls(BytesIO(data))
+    if file_name.lower().endswith(".xlsx"):
+        return [UploadedFile(Path(file_name).name, data)]
+    return []
+
+
+def parse_upload(request: Request) -> tuple[list[UploadedFile], str | None]:
+    """The uploaded xlsx files, and the level, if it was a field of the form."""
+    content_type = request.headers.get("content-type", "")
+    try:
+        if not content_type.startswith("multipart/form-data"):
+            return extract_xls(BytesIO(request.body)), None  # the body is a zip
+        message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + request.body)
+        files: list[UploadedFile] = []
+        level = None
+        for part in message.iter_parts():
+            data = part.get_payload(decode=True) or b""
+            if part.get_filename():
+                files += read_upload(part.get_filename(), data)
+            elif part.get_param("name", header="content-disposition") == "level":
+                level = data.decode("utf-8").strip()
+        return files, level
+    except zipfile.BadZipFile as e:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Not a zip file: {e}")
+
+
+class ReportService:
+    def __init__(self, db_dir: Path = TMP_DIR, max_jobs: int = DEFAULT_MAX_JOBS, workers: int = 1, cache: ParseCache | None = None):
+        self.db_dir = db_dir
+        self.workers = workers
+        self.cache = cache
+        self.runner = JobRunner(max_jobs)
+        self.locks = {level: asyncio.Lock() for level in LEVELS}  # one report at a time per database
+        self.databases: dict[CsoportType, SqliteDatabase] = {}
+
+    def close(self):
+        self.runner.shutdown()
+        for db in self.databases.values():
+            db.close()
+        self.databases.clear()
+
+    def warm_up(self):
+        allowed_names_index()  # loaded once, for every report
+
+    def database(self, level: CsoportType) -> SqliteDatabase:
+        if level not in self.databases:
+            self.db_dir.mkdir(parents=True, exist_ok=True)
+            self.databases[level] = SqliteDatabase(
+                self.db_dir / f"{level}.database.sqlite", import_from=self.db_dir / f"{level}.database.ini"
+            )
+        return self.databases[level]
+
+    async def build_report(self, files: list[UploadedFile], level: CsoportType) -> tuple[str, bytes]:
+        db = self.database(level)
+
+        def build(job: Job) -> tuple[str, bytes]:
+            collective_df, output_file_name = process(files, db, level, Path(), self.workers, self.cache)
+            collective_df.reset_index(inplace=True)
+            buffer = BytesIO()
+            to_excel(buffer, collective_df)
+            return output_file_name.name, buffer.getvalue()
+
+        async with self.locks[level]:
+            return await asyncio.wrap_future(self.runner.submit(build).future)
+
+    async def post_reports(self, request: Request) -> tuple[HTTPStatus, bytes, str, dict[str, str]]:
+        files, form_level = parse_upload(request)
+        level = form_level or request.query.get("level", [None])[0]
+        if level not in LEVELS:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"level must be one of {LEVELS}, got: {level}")
+        if not files:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "No xlsx files in the upload")
+        try:
+            file_name, data = await self.build_report(files, level)
+        except IssuesError as e:
+            issues = {"name_issues": [asdict(i) for i in e.name_issues], "email_issues": [asdict(i) for i in e.email_issues]}
+            return HTTPStatus.CONFLICT, json_body({"error": str(e), **issues}), "application/json", {}
+        except ReportError as e:
+            raise HttpError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+        except (zipfile.BadZipFile, KeyError, ValueError) as e:  # e.g. a corrupt xlsx, or a sheet with other columns
+            raise HttpError(HTTPStatus.UNPROCESSABLE_ENTITY, f"Could not read the sheets: {type(e).__name__}: {e}")
+        disposition = f"attachment; filename*=UTF-8''{urllib.parse.quote(file_name)}"
+        return HTTPStatus.OK, data, XLSX_MIME, {"Content-Disposition": disposition}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        request: Request | None = None
+        try:
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    return
+                if request.path != "/reports":
+                    raise HttpError(HTTPStatus.NOT_FOUND, f"Unknown path: {request.path}")
+                if request.method != "POST":
+                    raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+                status, body, content_type, headers = await self.post_reports(request)
+            except HttpError as e:
+                status, body, content_type, headers = e.status, json_body({"error": str(e)}), "application/json", {}
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                status, body, content_type, headers = HTTPStatus.BAD_REQUEST, json_body({"error": str(e)}), "application/json", {}
+            except ConnectionError:
+                raise
+            except Exception as e:  # a bug: answer anyway, the client would wait for the response otherwise
+                traceback.print_exc()
+                error = json_body({"error": f"Internal error: {type(e).__name__}: {e}"})
+                status, body, content_type, headers = HTTPStatus.INTERNAL_SERVER_ERROR, error, "application/json", {}
+            await write_response(writer, status, body, content_type, headers)
+            print(f"{request.method} {request.path} {status.value}" if request else f"- - {status.value}")
+        except ConnectionError:
+            pass  # the client went away
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> asyncio.Server:
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def serve_forever(service: ReportService, host: str, port: int):
+    server = await service.serve(host, port)
+    print(f"Serving POST http://{host}:{server.sockets[0].getsockname()[1]}/reports, Ctrl+C to stop.")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Összesítők készítése HTTP kérésre (POST /reports), szkriptekből való használatra")
+    parser.add_argument("--host", default="127.0.0.1", help="(alapértelmezett: 127.0.0.1, csak helyi kérések)")
+    parser.add_argument("--port", type=int, default=8556, help="(alapértelmezett: 8556)")
+    parser.add_argument(
+        "--max-jobs", type=int, default=DEFAULT_MAX_JOBS, help=f"Egyszerre készülő összesítők száma (alapértelmezett: {DEFAULT_MAX_JOBS})"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Párhuzamos Excel beolvasás folyamatainak száma (alapértelmezett: 1)")
+    parser.add_argument("--db-dir", type=Path, default=TMP_DIR, help="A szintek adatbázisainak mappája (alapértelmezett: <projekt>/tmp)")
+    args = parser.parse_args()
+
+    service = ReportService(args.db_dir, args.max_jobs, args.workers, ParseCache(PARSE_CACHE_DIR))
+    service.warm_up()
+    try:
+        asyncio.run(serve_forever(service, args.host, args.port))
+    except KeyboardInterrupt:
+        print("Bye! :)")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Synthetic Google Forms exports, for benchmarks and tests.
+
+    python -m jelenlet.synthetic <folder> --members 500 --rehearsals 40 --name-typos 0.02
+"""
+
+import argparse
+import datetime
+import random
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+
+import xlsxwriter
+
+from jelenlet.process import CsoportType
+
+SURNAMES = [
+    "Nagy", "Kovács", "Tóth", "Szabó", "Horváth", "Varga", "Kiss", "Molnár", "Németh", "Farkas",
+    "Balogh", "Papp", "Takács", "Juhász", "Lakatos", "Mészáros", "Oláh", "Simon", "Rácz", "Fekete",
+    "Szilágyi", "Török", "Fehér", "Balázs", "Gál", "Kis", "Szűcs", "Kocsis", "Orsós", "Pintér",
+]  # fmt: skip
+GIVEN_NAMES = [
+    "Anna", "Ádám", "Balázs", "Bence", "Csilla", "Dániel", "Dóra", "Eszter", "Éva", "Gábor",
+    "Gergő", "Ildikó", "István", "Júlia", "Katalin", "Krisztián", "László", "Márton", "Nóra", "Péter",
+    "Réka", "Sándor", "Szilvia", "Tamás", "Viktória", "Zoltán", "Zsófia", "Ágnes", "Örs", "Ünige",
+]  # fmt: skip
+LEVEL_FILE_PREFIXES = {"kezdo": "Kezdő próba", "kozep": "Középhaladós próba", "halado": "Haladós próba", "egyeb": "Egyéb próba"}
+HEADER = ["Időbélyeg", "E-mail-cím", "Teljes név", "Jössz próbára?"]
+
+
+@dataclass
+class Rates:
+    """Probability of the problems, per row of a sheet."""
+
+    name_typos: float = 0.0  # accents missing, swapped name order, a missing letter or lowercase
+    gmail_typos: float = 0.0  # e.g. @gmial.com instead of @gmail.com
+    nan_emails: float = 0.0  # empty email cell
+    nem_answers: float = 0.05  # "Nem" for "Jössz próbára?"
+
+
+def strip_accents(text: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def member_names(n: int, rnd: random.Random) -> list[str]:
+    names = [f"{s} {g}" for s in SURNAMES for g in GIVEN_NAMES]
+    if n <= len(names):
+        return rnd.sample(names, n)
+    # large seasons: the rest get a second given name
+    second = [f"{name} {g}" for name in names for g in GIVEN_NAMES if not name.endswith(g)]
+    if n > len(names) + len(second):
+        raise ValueError(f"At most {len(names) + len(second)} members are supported")
+    return names + rnd.sample(second, n - len(names))
+
+
+def name_typo(name: str, rnd: random.Random) -> str:
+    parts = name.split()
+    kind = rnd.randrange(4)
+    if kind == 0:
+        return strip_accents(name)
+    if kind == 1:
+        return " ".join(parts[1:] + parts[:1])
+    if kind == 2:
+        i = rnd.randrange(len(name))
+        return name if name[i] == " " else name[:i] + name[i + 1 :]
+    return name.lower()
+
+
+def gmail_typo(email: str, rnd: random.Random) -> str:
+    user, _ = email.split("@")
+    return f"{user}@{rnd.choice(['gmial.com', 'gmail.co', 'gamil.com'])}"
+
+
+def rehearsal_file_name(level: CsoportType, date: datetime.date) -> str:
+    return f"{LEVEL_FILE_PREFIXES[level]} - {date.year}. {date.month:02d}. {date.day:02d}. (válaszok).xlsx"
+
+
+def generate_season(
+    folder: Path,
+    members: int = 100,
+    rehearsals: int = 20,
+    level: CsoportType = "kozep",
+    rates: Rates = Rates(),
+    attendance: float = 0.7,
+    start: datetime.date = datetime.date(2025, 9, 1),
+    seed: int = 0,
+) -> list[Path]:
+    """Write `rehearsals` weekly sign-up sheets of `members` people to `folder`, return their paths."""
+    rnd = random.Random(seed)
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    names = member_names(members, rnd)
+    emails = [f"{strip_accents(n).lower().replace(' ', '.')}.{i}@gmail.com" for i, n in enumerate(names)]
+
+    files = []
+    for r in range(rehearsals):
+        date = start + datetime.timedelta(weeks=r)
+        path = folder / rehearsal_file_name(level, date)
+        attending = [i for i in range(members) if rnd.random() < attendance]
+        rnd.shuffle(attending)
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "default_date_format": "yyyy/mm/dd hh:mm:ss"})
+        sheet = workbook.add_worksheet("Űrlapválaszok 1")
+        sheet.write_row(0, 0, HEADER)
+        for row, i in enumerate(attending, start=1):
+            name = name_typo(names[i], rnd) if rnd.random() < rates.name_typos else names[i]
+            email: str | None = gmail_typo(emails[i], rnd) if rnd.random() < rates.gmail_typos else emails[i]
+            if rnd.random() < rates.nan_emails:
+                email = None
+            answer = "Nem" if rnd.random() < rates.nem_answers else "Igen"
+            timestamp = datetime.datetime.combine(date, datetime.time(8)) - datetime.timedelta(minutes=row)
+            sheet.write_row(row, 0, [timestamp, email, name, answer])
+        workbook.close()
+        files.append(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Szintetikus jelenléti táblázatok készítése teszteléshez")
+    parser.add_argument("folder", type=Path, help="Ebbe a mappába kerülnek a táblázatok.")
+    parser.add_argument("--members", type=int, default=100, help="Tagok száma (alapértelmezett: 100)")
+    parser.add_argument("--rehearsals", type=int, default=20, help="Próbák száma (alapértelmezett: 20)")
+    parser.add_argument("--szint", choices=list(LEVEL_FILE_PREFIXES), default="kozep", help="Csoport szintje (alapértelmezett: kozep)")
+    parser.add_argument("--name-typos", type=float, default=0.0, help="Elgépelt nevek aránya (alapértelmezett: 0)")
+    parser.add_argument("--gmail-typos", type=float, default=0.0, help="Elgépelt gmail címek aránya (alapértelmezett: 0)")
+    parser.add_argument("--nan-emails", type=float, default=0.0, help="Üres email címek aránya (alapértelmezett: 0)")
+    parser.add_argument("--nem-answers", type=float, default=0.05, help="'Nem' válaszok aránya (alapértelmezett: 0.05)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rates = Rates(args.name_typos, args.gmail_typos, args.nan_emails, args.nem_answers)
+    files = generate_season(args.folder, args.members, args.rehearsals, args.szint, rates, seed=args.seed)
+    print(f"{len(files)} files written to {args.folder}")
+
+
+if __name__ == "__main__":
+    main()
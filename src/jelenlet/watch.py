@@ -0,0 +1,159 @@
+"""Rebuild the report of a folder whenever a sign-up sheet of the level is added or changed.
+
+    jelenlet-watch <folder> --szint kozep --out reports
+
+One long running process: the parsed sheets and the fixer results stay in memory (process_incremental
+with a kept IncrementalState), so a new sheet costs parsing that one file. The folder is polled with
+os.scandir: no file system event library needed, works on network drives too. A file is only read
+after its size and mtime stayed the same for --settle seconds, so files being copied are not read
+half way.
+"""
+
+import argparse
+import os
+import time
+import zipfile
+from pathlib import Path
+from typing import Callable, Sequence
+
+from jelenlet.cache import ParseCache
+from jelenlet.database import Database
+from jelenlet.errors import ReportError
+from jelenlet.export import EXPORT_FORMATS, ExportFormat
+from jelenlet.incremental import load_state, process_incremental, state_file
+from jelenlet.paths import PARSE_CACHE_DIR
+from jelenlet.process import LEVELS, XLSX_FILENAME_DATE_PATTERNS, CsoportType
+
+Snapshot = dict[str, tuple[int, int]]  # file name -> mtime_ns, size
+
+
+def snapshot(folder: Path, level: CsoportType) -> Snapshot:
+    """mtime and size of the sheets of `level` in `folder`: one stat per file."""
+    pattern = XLSX_FILENAME_DATE_PATTERNS[level]
+    files: Snapshot = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if pattern.match(entry.name) and entry.is_file():
+                stat = entry.stat()
+                files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+class FolderWatcher:
+    """Builds the report of `folder`, when its sheets or the database changed, and stayed unchanged for `settle` seconds."""
+
+    def __init__(
+        self,
+        folder: Path,
+        output_dir: Path,
+        level: CsoportType,
+        db: Database,
+        save: Callable,  # save(collective_df, output_file_name) -> path of the report, e.g. cli.save_report
+        settle: float = 2.0,
+        workers: int = 1,
+        cache: ParseCache | None = None,
+    ) -> None:
+        self.folder = folder
+        self.output_dir = output_dir
+        self.level = level
+        self.db = db
+        self.save = save
+        self.settle = settle
+        self.workers = workers
+        self.cache = cache
+        self.state = load_state(state_file(folder, level))  # warm from here on
+        self._built: tuple[Snapshot, dict[str, str]] | None = None  # inputs of the last build
+        self._seen: tuple[Snapshot, dict[str, str]] | None = None  # inputs at the last poll
+        self._seen_since = 0.0
+        self.report: Path | None = None
+
+    def poll(self, now: float | None = None) -> bool:
+        """Check the folder once, build the report if needed. True, if a build was attempted."""
+        now = time.monotonic() if now is None else now
+        current = (snapshot(self.folder, self.level), dict(self.db.read_email_name_database()))
+        if current != self._seen:  # still changing: wait until it settles
+            self._seen, self._seen_since = current, now
+            return False
+        if current == self._built or now - self._seen_since < self.settle or not current[0]:
+            return False
+        self._built = current  # failed builds are retried only after a change: the sheet or the database was fixed
+        self.build()
+        return True
+
+    def build(self):
+        print(f"===== {time.strftime('%H:%M:%S')} Building the report =====")
+        try:
+            collective_df, output_file_name = process_incremental(
+                self.folder, self.db, self.level, self.output_dir, self.workers, self.cache, self.state
+            )
+        except ReportError as e:
+            print(e)
+            return
+        except (zipfile.BadZipFile, OSError, EOFError) as e:  # e.g. an xlsx still being written, but not growing for a while
+            print(f"[WARNING] Could not read the sheets, waiting for the next change: {e}")
+            return
+        report = self.save(collective_df, output_file_name)
+        if self.report and self.report != report:  # one up to date report in the output folder, in every format
+            for extension, _, _ in EXPORT_FORMATS.values():
+                self.report.with_suffix(extension).unlink(missing_ok=True)
+        self.report = report
+
+    def run(self, interval: float = 1.0):
+        print(f"Watching {self.folder} ({self.level}), Ctrl+C to stop.")
+        try:
+            while True:
+                self.poll()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("Bye! :)")
+
+
+def parse_watch_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="jelenlet-watch", description="A mappába kerülő új vagy módosult táblázatok után automatikusan frissíti az összesítőt"
+    )
+    parser.add_argument("folder", type=Path, help="A figyelt bemeneti mappa")
+    parser.add_argument("--out", type=Path, default=Path("reports"), help="Kimeneti mappa (alapértelmezett: ./reports)")
+    parser.add_argument("--szint", choices=LEVELS, default="kozep", help="Csoport szintje (alapértelmezett: kozep)")
+    parser.add_argument("--db-engine", choices=["ini", "sqlite"], default="ini", help="Az email-név adatbázis tárolása (alapértelmezett: ini)")
+    parser.add_argument(
+        "--format", nargs="+", choices=["xlsx", "csv", "parquet", "json"], default=["xlsx"], help="Az összesítő formátuma (alapértelmezett: xlsx)"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Párhuzamos Excel beolvasás folyamatainak száma (alapértelmezett: 1)")
+    parser.add_argument("--interval", type=float, default=1.0, help="Ennyi másodpercenként nézi meg a mappát (alapértelmezett: 1)")
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="Ennyi másodpercig változatlan fájlokat dolgoz fel, a még másolás alatt állókat nem (alapértelmezett: 2)",
+    )
+    args = parser.parse_args(argv)
+    if not args.folder.is_dir():
+        parser.error(f"A megadott útvonal nem mappa: {args.folder}")
+    if args.workers < 0:
+        parser.error(f"A --workers értéke nem lehet negatív: {args.workers}")
+    args.out.mkdir(parents=True, exist_ok=True)
+    return args
+
+
+def main(argv: Sequence[str] | None = None):
+    from jelenlet.cli import open_database, save_report
+
+    args = parse_watch_args(argv)
+    formats: list[ExportFormat] = args.format
+    db = open_database(args.db_engine, delete_db=False, clean=False)
+    watcher = FolderWatcher(
+        args.folder,
+        args.out,
+        args.szint,
+        db,
+        lambda df, output_file_name: save_report(df, output_file_name, formats),
+        args.settle,
+        args.workers,
+        ParseCache(PARSE_CACHE_DIR),
+    )
+    watcher.run(args.interval)
+
+
+if __name__ == "__main__":
+    main()
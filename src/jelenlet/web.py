@@ -1,22 +1,35 @@
 import streamlit as st
 
-import tempfile
-import shutil
 import os
-import zipfile
+import time
 from io import BytesIO
 from pathlib import Path
 from typing import Literal
-from datetime import datetime, timedelta
 
+import pandas as pd
 
-from jelenlet.process import process
-from jelenlet.excel_export import to_excel
+from jelenlet.process import ReportPipeline, UploadedFile, extract_xls
+from jelenlet.excel_export import to_excel, render_attendance_markers
+from jelenlet.export import EXPORT_FORMATS, ExportFormat, export, export_file_name
 from jelenlet.errors import ReportError
-from jelenlet.database import Database
+from jelenlet.database import Database, SqliteDatabase
+from jelenlet.cache import ParseCache
+from jelenlet.jobs import Job, JobRunner
+from jelenlet.metrics import Metrics, collect_metrics, span
 
 CsoportType = Literal["kezdo", "kozep", "halado", "egyeb"]
-GenerationState = Literal["UPLOAD", "FIX_ERRORS", "DOWNLOAD"]
+GenerationState = Literal["UPLOAD", "RUNNING", "FIX_ERRORS", "DOWNLOAD"]
+STAGE_LABELS = {
+    "ingest": "Táblázatok beolvasása",
+    "journal": "Nevek és email címek összegyűjtése",
+    "fix": "Hibák keresése",
+    "aggregate": "Összesítés",
+    "export": "Excel fájl készítése",
+}
+
+DB_DIR = Path("tmp")  # the databases of the levels, shared by the sessions
+# Uploads are only kept in the session, unless the operator sets this: then the parsed sheets are cached there.
+PARSE_CACHE_ENV = "JELENLET_WEB_PARSE_CACHE"
 
 
 def run():
@@ -28,41 +41,19 @@ def run():
     subprocess.run([sys.executable, "-m", "streamlit", "run", "src/jelenlet/web.py", "--server.runOnSave", "true", "--server.port", "8555"])
 
 
-def add_download_button_xlsx(file: Path) -> bool:
-    # Download button with xlsx file
-    if not file.name.endswith("xlsx"):
-        return False
-    with open(file, mode="rb") as f:
-        b = BytesIO()
-        b.writelines(f.readlines())
-    return st.download_button("Letöltés", icon=":material/download_2:", data=b, file_name=file.name, key="download_xlsx_btn")
-
+def add_download_button(file_name: str, data: bytes, fmt: ExportFormat) -> bool:
+    _, _, mime = EXPORT_FORMATS[fmt]
+    return st.download_button("Letöltés", icon=":material/download_2:", data=data, file_name=file_name, mime=mime, key="download_btn")
 
-def extract_xls(zip_file, dest) -> list[Path]:
-    extracted_files: list[Path] = []
-    with zipfile.ZipFile(zip_file) as zf:
-        for member in zf.namelist():
-            if not member.lower().endswith(".xlsx"):
-                continue
-            dest_file = Path(dest) / Path(member).name  # zip slip protection
-            with zf.open(member) as source, open(dest_file, "wb") as target:
-                shutil.copyfileobj(source, target)
-                extracted_files.append(dest_file)
-    return extracted_files
 
-
-def copy_or_extract_to(dir, uploaded_files) -> list[Path]:
-    copied_files: list[Path] = []
+def read_uploaded_files(uploaded_files) -> list[UploadedFile]:
+    files: list[UploadedFile] = []
     for file in uploaded_files:
         if file.name.lower().endswith("zip"):
-            copied_files.extend(extract_xls(file, dir))
+            files.extend(extract_xls(file))
         else:
-            file_dest = Path(dir) / file.name
-            # st.write(file_dest)
-            with open(file_dest, "wb") as f:
-                f.write(file.getbuffer())
-                copied_files.append(file_dest)
-    return copied_files
+            files.append(UploadedFile(file.name, file.getvalue()))
+    return files
 
 
 def upload_ui():
@@ -82,33 +73,83 @@ def upload_ui():
             help="Futás előtt törli az email-név adatbázist. Hasznos lehet, ha korábbi futtatás értékeit kell javítani.",
             key="delete_db_checkbox",
         )
+        parallel = st.checkbox(
+            "Párhuzamos beolvasás",
+            help="A táblázatokat több processzormagon olvassa be. Sok fájl esetén gyorsabb.",
+            key="parallel_read_checkbox",
+        )
+        st.session_state.workers = 0 if parallel else 1
         submitted = st.form_submit_button("Feltöltés", icon=":material/upload_2:")
 
     if submitted and uploaded_files and len(uploaded_files) > 0:
         st.write(f"Feltöltött fájlok: {len(uploaded_files)}")
-        with tempfile.TemporaryDirectory(prefix="tmp_uploaded_files_", dir="./tmp", delete=False) as tmp:
-            xlsx_recieved = copy_or_extract_to(tmp, uploaded_files)
-            if len(xlsx_recieved) < 1:
-                st.write("Nem találtam .xlsx fájlt a feltöltésben! :( ")
-                return
-            st.session_state.tmp = tmp
-            db = Database(Path(tmp).parent / f"{level}.database.ini", delete_db=delete_db)
-            st.session_state.db = db
-            try_to_generate_report(tmp, db, level)
-
-
-def try_to_generate_report(tmp, db, level):
-    try:
-        collective_df, output_file_name = process(Path(tmp), db, level, tmp)
-        collective_df.reset_index(inplace=True)
-        to_excel(output_file_name, collective_df)
-        st.session_state.output_file = output_file_name
-        st.session_state.collective_dataframe = collective_df
-        st.session_state.state = "DOWNLOAD"
+        xlsx_recieved = read_uploaded_files(uploaded_files)  # kept in memory, nothing is written to disk
+        if len(xlsx_recieved) < 1:
+            st.write("Nem találtam .xlsx fájlt a feltöltésben! :( ")
+            return
+        # sqlite: several sessions may work on the same level at the same time
+        DB_DIR.mkdir(exist_ok=True)
+        close_database()
+        db = SqliteDatabase(DB_DIR / f"{level}.database.sqlite", delete_db=delete_db, import_from=DB_DIR / f"{level}.database.ini")
+        st.session_state.db = db
+        # parsed sheets and journal stay in the session: saving a database fix only reruns the fixers
+        workers = st.session_state.get("workers", 1)
+        st.session_state.pipeline = ReportPipeline(xlsx_recieved, level, workers, parse_cache())
+        try_to_generate_report(st.session_state.pipeline, db)
+
+
+def parse_cache() -> ParseCache | None:
+    cache_dir = os.environ.get(PARSE_CACHE_ENV)
+    return ParseCache(Path(cache_dir)) if cache_dir else None
+
+
+@st.cache_resource
+def job_runner() -> JobRunner:
+    # one pool for every session: limits the reports built at the same time
+    return JobRunner()
+
+
+def try_to_generate_report(pipeline: ReportPipeline, db):
+    def build(job: Job) -> tuple[str, bytes, pd.DataFrame, Metrics]:
+        # runs on a worker thread: must not touch st.session_state
+        with collect_metrics() as metrics:
+            collective_df, output_file_name = pipeline.run(db, Path(), job.report)
+            collective_df.reset_index(inplace=True)
+            job.report("export", 0, 1)
+            buffer = BytesIO()
+            with span("export xlsx") as s:
+                to_excel(buffer, collective_df)
+                s.rows = len(collective_df)
+            job.report("export", 1, 1)
+        return output_file_name.name, buffer.getvalue(), collective_df, metrics
+
+    st.session_state.job = job_runner().submit(build)
+    st.session_state.state = "RUNNING"
+    st.rerun()
+
+
+def running_ui():
+    job: Job = st.session_state.job
+    if not job.done():
+        event = job.latest
+        if event is None:
+            st.progress(0.0, text="Várakozás egy szabad feldolgozóra...")
+        else:
+            st.progress(event.done / max(event.total, 1), text=f"{STAGE_LABELS[event.stage]} ({event.done}/{event.total})")
+        time.sleep(0.3)
         st.rerun()
+
+    try:
+        output_file_name, output_data, collective_df, metrics = job.result()
     except ReportError:
         st.session_state.state = "FIX_ERRORS"
         st.rerun()
+    st.session_state.output_file = output_file_name
+    st.session_state.output_data = output_data
+    st.session_state.collective_dataframe = collective_df
+    st.session_state.metrics = metrics
+    st.session_state.state = "DOWNLOAD"
+    st.rerun()
 
 
 def fix_errors_ui():
@@ -129,38 +170,51 @@ def fix_errors_ui():
             db.write_all_lines(new_lines)
             if clean:
                 db.remove_comments()
-            level = st.session_state.level
-            tmp = st.session_state.tmp
-            try_to_generate_report(tmp, db, level)
+            try_to_generate_report(st.session_state.pipeline, db)
 
 
 def download_ui():
     st.write("Mentsd el a létrehozott összesítőt:")
-    add_download_button_xlsx(st.session_state.output_file)
-    st.dataframe(st.session_state.collective_dataframe)
+    fmt = st.segmented_control(
+        "Formátum", list(EXPORT_FORMATS), default="xlsx", key="format_control", help="csv, parquet, json: a jelenlét 1 / 0, nem X / _"
+    )
+    fmt = fmt or "xlsx"
+    if fmt == "xlsx":  # made by the job
+        data = st.session_state.output_data
+    else:
+        buffer = BytesIO()
+        export(buffer, st.session_state.collective_dataframe, fmt)
+        data = buffer.getvalue()
+    add_download_button(export_file_name(Path(st.session_state.output_file), fmt).name, data, fmt)
+    st.dataframe(render_attendance_markers(st.session_state.collective_dataframe))
+    metrics_ui(st.session_state.metrics)
     st.button("Új feldolgozás", key="new_run_btn", on_click=cleanup, icon=":material/replay:")
 
 
+def metrics_ui(metrics: Metrics):
+    with st.expander("Futási idők"):
+        # the stages of a rerun after a database fix: the sheets and the journal come from the session
+        spans = pd.DataFrame(
+            {
+                "Lépés": ["\u2003" * s.depth + s.name for s in metrics.spans],
+                "Idő (s)": [s.seconds for s in metrics.spans],
+                "Sorok": [s.rows for s in metrics.spans],
+            }
+        )
+        st.dataframe(spans, hide_index=True, column_config={"Idő (s)": st.column_config.NumberColumn(format="%.3f")})
+
+
+def close_database():
+    db: Database | None = st.session_state.pop("db", None)
+    if db is not None:
+        db.close()
+
+
 def cleanup():
     st.session_state.state = "UPLOAD"
-    print(st.session_state.tmp)
-    if Path("tmp").absolute() == Path(st.session_state.tmp).parent.absolute():
-        shutil.rmtree(st.session_state.tmp)
-    else:
-        print(f"Session tmp not in ./tmp? Cleanup did not happen... {st.session_state.tmp}")
-
-    # Delete old dirs in ./tmp:
-    for child in Path("tmp").iterdir():
-        if child.name.startswith("."):  # don't delete dot files, .gitkeep, .gitignore, etc...
-            continue
-        mtime = child.stat().st_mtime
-        age: timedelta = datetime.now() - datetime.fromtimestamp(mtime)
-        print(f"{child} age: {age}")
-        if age > timedelta(hours=36):
-            if child.is_dir():
-                shutil.rmtree(child)
-            else:
-                os.remove(child)
+    for key in ["pipeline", "job", "output_data", "collective_dataframe", "metrics"]:  # free the memory of the uploaded files
+        st.session_state.pop(key, None)
+    close_database()
 
 
 def main():
@@ -172,6 +226,8 @@ def main():
 
     if st.session_state.state == "UPLOAD":
         upload_ui()
+    elif st.session_state.state == "RUNNING":
+        running_ui()
     elif st.session_state.state == "FIX_ERRORS":
         fix_errors_ui()
     elif st.session_state.state == "DOWNLOAD":
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from jelenlet.archive import append_season, load_archive, main, query_member, query_overlap, query_rates, query_streaks
+
+
+def season(emails: list[str], dates: list[str], attendance: list[list[int]]) -> pd.DataFrame:
+    df = pd.DataFrame(np.array(attendance, dtype=np.int8), index=pd.Index(emails, name="Email"), columns=dates)
+    df.insert(0, "Név", [e.split("@")[0].title() for e in emails])
+    df.insert(1, "Össz.", df[dates].sum(axis=1))
+    return df
+
+
+def test_archive_appends_seasons_and_answers_queries(tmp_path):
+    autumn = season(["a@x.hu", "b@x.hu"], ["2024.09.02", "2024.09.09", "2024.09.16"], [[1, 1, 0], [0, 1, 1]])
+    spring = season(["b@x.hu", "c@x.hu"], ["2025.02.03", "2025.02.10"], [[1, 1], [1, 0]])
+    append_season(autumn, "kozep", tmp_path)
+    append_season(spring.reset_index(), "kozep", tmp_path)
+    append_season(autumn, "kozep", tmp_path)  # again: no change
+    append_season(season(["c@x.hu"], ["2024.10.01"], [[1]]), "kezdo", tmp_path)
+
+    kozep, kezdo = load_archive("kozep", tmp_path), load_archive("kezdo", tmp_path)
+    assert kozep.emails == ["a@x.hu", "b@x.hu", "c@x.hu"]
+    assert len(kozep.dates) == 5 and len(list(tmp_path.glob("kozep.*.bits"))) == 1
+
+    assert [(e, n) for e, _, n, _, _ in query_rates(kozep, min_rate=0.5)] == [("b@x.hu", 4)]
+    assert [(e, n) for e, _, n, _, _ in query_rates(kozep, since="2025.01.01")] == [("b@x.hu", 2), ("c@x.hu", 1)]
+    assert query_streaks(kozep, top=1) == [("b@x.hu", "B", 4, 4)]
+    assert [e for e, _, _ in query_overlap([kozep, kezdo])] == ["c@x.hu"]
+    assert query_member([kozep, kezdo], "c@x.hu") == [("kozep", "C", 1, 5, 1), ("kezdo", "C", 1, 1, 1)]
+    assert load_archive("halado", tmp_path).emails == []
+
+
+def test_archive_keeps_the_names_of_the_newest_season(tmp_path):
+    spring = season(["a@x.hu"], ["2025.02.03"], [[1]])
+    autumn = season(["a@x.hu"], ["2024.09.02"], [[1]])
+    autumn["Név"] = ["Régi Név"]
+    append_season(spring, "kozep", tmp_path)
+    append_season(autumn, "kozep", tmp_path)  # back-filled, older season
+    assert load_archive("kozep", tmp_path).names == ["A"]
+
+
+def test_concurrent_appends_keep_every_season(tmp_path):
+    seasons = [season([f"m{i}@x.hu"], [f"2024.09.{i + 1:02d}"], [[1]]) for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda df: append_season(df, "kozep", tmp_path), seasons))
+
+    archive = load_archive("kozep", tmp_path)
+    assert sorted(archive.emails) == [f"m{i}@x.hu" for i in range(8)]
+    assert len(archive.dates) == 8 and archive.matrix().sum() == 8
+    assert not (tmp_path / "kozep.lock").exists()
+
+
+def test_archive_command(tmp_path, capsys):
+    append_season(season(["a@x.hu"], ["2025.02.03"], [[1]]), "kozep", tmp_path)
+    main(["query", "summary", "--szint", "kozep", "halado", "--archive-dir", str(tmp_path)])
+    assert capsys.readouterr().out.splitlines() == [
+        "kozep: 1 members, 1 rehearsals (2025.02.03 - 2025.02.03)",
+        "halado: 0 members, 0 rehearsals",
+    ]
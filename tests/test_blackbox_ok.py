@@ -1,8 +1,19 @@
 import pytest
+import datetime
 import os
+import shutil
+import numpy as np
 import pandas as pd
+from io import BytesIO
+from jelenlet import cli as cli_module
 from jelenlet.cli import run_program
 from jelenlet.database import Database
+from jelenlet import incremental as incremental_module
+from jelenlet import process as process_module
+from jelenlet.errors import ReportError
+from jelenlet.process import EMAIL, JOSSZ, ReportPipeline, UploadedFile, construct_collective_dataframe
+from jelenlet.excel_export import to_excel
+from jelenlet.synthetic import generate_season
 from pathlib import Path
 
 
@@ -66,3 +77,88 @@ def test_name_typo_case():
     # cleanup
     os.remove(output_path)
     os.remove(db_path)
+
+
+def test_pipeline_rerun_after_fix_skips_ingest(tmp_path, monkeypatch):
+    input_dir = Path("tests/data/name_typo/input")
+    db = Database(tmp_path / "database.ini")
+    pipeline = ReportPipeline(input_dir, "kozep")
+
+    with pytest.raises(ReportError):
+        pipeline.run(db, tmp_path)  # writes the suggested fix to the database
+
+    monkeypatch.setattr(process_module, "read_xlsx", lambda f: pytest.fail(f"{f} was parsed again"))
+    df, _ = pipeline.run(db, tmp_path)
+    monkeypatch.undo()
+
+    full_df, _ = process_module.process(input_dir, db, "kozep", tmp_path)
+    pd.testing.assert_frame_equal(df, full_df)
+
+
+@pytest.mark.filterwarnings("ignore:Conditional Formatting extension is not supported:UserWarning")
+def test_in_memory_files_match_folder(tmp_path):
+    input_dir = Path("tests/data/ok/input")
+    files = [UploadedFile(f.name, f.read_bytes()) for f in input_dir.iterdir()]
+
+    folder_df, _ = process_module.process(input_dir, Database(tmp_path / "a.ini"), "kozep", tmp_path)
+    memory_df, _ = process_module.process(files, Database(tmp_path / "b.ini"), "kozep", tmp_path)
+    pd.testing.assert_frame_equal(folder_df, memory_df)
+
+    buffer = BytesIO()
+    to_excel(buffer, memory_df.reset_index())
+    expected_df = load_xlsx(Path("tests/data/ok/expected/kozep_proba_osszegzes_input.xlsx"))
+    pd.testing.assert_frame_equal(expected_df, pd.read_excel(BytesIO(buffer.getvalue())))
+
+
+def test_sheets_of_the_same_date_share_a_column(capsys):
+    file_names = [
+        "Középhaladós próba - 2025. 12. 01. (válaszok).xlsx",
+        "Középhaladós próba - 2025. 12. 08. (válaszok).xlsx",
+        "Középhaladós próba - 2025. 12. 01. (válaszok) (1).xlsx",  # a second form for the same rehearsal
+    ]
+    dfs = [
+        pd.DataFrame({EMAIL: ["a@x.hu", "b@x.hu"], JOSSZ: ["Igen", "Nem"]}),
+        pd.DataFrame({EMAIL: ["a@x.hu"], JOSSZ: ["Igen"]}),
+        pd.DataFrame({EMAIL: ["a@x.hu", "b@x.hu", "unknown@x.hu"], JOSSZ: ["Igen", "Igen", "Igen"]}),
+    ]
+    df = construct_collective_dataframe(file_names, dfs, {"a@x.hu": "A", "b@x.hu": "B"}, "kozep")
+
+    assert "Multiple files with the same date" in capsys.readouterr().out
+    assert list(df.columns) == ["Név", "Össz.", "2025.12.01", "2025.12.08"]
+    assert df["2025.12.01"].dtype == np.int8
+    assert df.loc["a@x.hu", "2025.12.01"] == 1 and df.loc["a@x.hu", "Össz."] == 2  # counted once, not twice
+    assert df.loc["b@x.hu", "2025.12.01"] == 1 and df.loc["b@x.hu", "Össz."] == 1  # "Nem" on one form, "Igen" on the other
+
+
+@pytest.mark.filterwarnings("ignore:Conditional Formatting extension is not supported:UserWarning")
+def test_all_levels_in_one_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli_module, "DATA_DIR", tmp_path)  # the databases of the levels
+    folder = tmp_path / "input"
+    folder.mkdir()
+    for f in Path("tests/data/ok/input").iterdir():
+        shutil.copy(f, folder / f.name)
+        shutil.copy(f, folder / f.name.replace("Középhaladós", "Haladós"))
+
+    results = cli_module.run_all_levels(folder, tmp_path)
+
+    assert set(results) == {"kozep", "halado"}
+    expected_df = load_xlsx(Path("tests/data/ok/expected/kozep_proba_osszegzes_input.xlsx"))
+    for output_file in results.values():
+        assert output_file
+        pd.testing.assert_frame_equal(expected_df, load_xlsx(output_file))
+    assert (tmp_path / "halado.database.ini").exists()
+
+
+@pytest.mark.filterwarnings("ignore:Conditional Formatting extension is not supported:UserWarning")
+def test_all_levels_incremental_keeps_the_levels_apart(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli_module, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(incremental_module, "INCREMENTAL_STATE_DIR", tmp_path / "state")
+    folder = tmp_path / "input"
+    kozep = generate_season(folder, members=10, rehearsals=3, level="kozep")
+    egyeb = generate_season(folder, members=10, rehearsals=2, level="egyeb", start=datetime.date(2025, 10, 6))
+
+    for _ in range(2):  # a full run, then one from the saved state
+        results = cli_module.run_all_levels(folder, tmp_path, incremental=True)
+        assert set(results) == {"kozep", "egyeb"}
+        assert len(load_xlsx(results["kozep"]).columns) == 3 + len(kozep)  # Email, Név, Össz. and the dates
+        assert len(load_xlsx(results["egyeb"]).columns) == 3 + len(egyeb)
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from jelenlet.collation import hungarian_sort_key
+from jelenlet.process import sort_by_name
+
+
+def test_hungarian_alphabetical_order():
+    expected = [
+        "Cukor Anna",
+        "Czakó Ádám",
+        "Csizmár Béla",  # cs after c
+        "Dörgő Ede",
+        "Dzsida Ede",  # dzs after dz, not d z s
+        "Hosszú Ede",  # ssz: sz sz
+        "Hoszu Ede",
+        "Kis Abel",
+        "Kis Ábel",  # the accent only counts after the letters
+        "Kis Anna",
+        "Kiss Anna",  # word by word
+        "Lengyel Ákos",  # gy before k
+        "Lenke Ákos",
+        "Ori Ödön",
+        "Öri Ödön",
+        "Őri Ödön",
+        "Zoltán Anna",
+        "Zsigmond Éva",
+    ]
+    assert sorted(reversed(expected), key=hungarian_sort_key) == expected
+
+
+def test_sort_by_name_keeps_missing_names_last():
+    df = pd.DataFrame({"Név": ["Zsigmond Éva", float("nan"), "Ábel Anna", "Csaba Ede"]})
+    sort_by_name(df)
+    assert df["Név"].tolist()[:3] == ["Ábel Anna", "Csaba Ede", "Zsigmond Éva"]
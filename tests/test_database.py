@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+from jelenlet import database as database_module
+from jelenlet.cli import main, run_program
+from jelenlet.database import Database, SqliteDatabase
+from jelenlet.files import atomic_write
+
+INI_LINES = [
+    "# TODO: add <email> = <name> lines here\n",
+    "a@example.com = Alma Anna\n",
+    "\n",
+    "# Resolving with: [Béka Béla] reason:[based on occurance 3 to 1]\n",
+    "b@example.com = Béka Béla\n",
+    "# b@example.com = Beka Bela\n",
+]
+
+
+def test_sqlite_ini_round_trip(tmp_path):
+    ini = tmp_path / "database.ini"
+    ini.write_text("".join(INI_LINES), encoding="utf-8")
+    db = SqliteDatabase(tmp_path / "database.sqlite", import_from=ini)
+
+    assert db.read_email_name_database() == Database(ini).read_email_name_database()
+    assert db.read_name_email_index() == {"Alma Anna": {"a@example.com"}, "Béka Béla": {"b@example.com"}}
+
+    exported = tmp_path / "exported.ini"
+    db.export_ini(exported)
+    assert Database(exported).read_email_name_database() == db.read_email_name_database()
+    again = SqliteDatabase(tmp_path / "again.sqlite", import_from=exported)
+    assert again.read_all_lines() == db.read_all_lines() == INI_LINES  # in the order of the file
+
+    db.write_all_lines(db.read_all_lines())  # e.g. saving the web app's text area unchanged
+    db.db_append("# c@example.com = Cica Cili")
+    db.flush()
+    assert db.read_all_lines() == INI_LINES + ["# c@example.com = Cica Cili\n"]
+
+    db.remove_comments()
+    assert db.read_all_lines() == ["a@example.com = Alma Anna\n", "b@example.com = Béka Béla\n"]
+    db.close()
+
+
+def test_sqlite_delete_db_does_not_import(tmp_path):
+    ini = tmp_path / "database.ini"
+    ini.write_text("".join(INI_LINES), encoding="utf-8")
+
+    db = SqliteDatabase(tmp_path / "database.sqlite", delete_db=True, import_from=ini)
+    assert db.read_email_name_database() == {}
+    db.close()
+
+
+def test_sqlite_file_without_positions(tmp_path):
+    conn = sqlite3.connect(tmp_path / "database.sqlite")
+    conn.executescript(
+        """
+        CREATE TABLE email_names (email TEXT PRIMARY KEY, name TEXT NOT NULL);
+        CREATE TABLE suggestions (id INTEGER PRIMARY KEY AUTOINCREMENT, line TEXT NOT NULL);
+        INSERT INTO email_names VALUES ('a@example.com', 'Alma Anna');
+        INSERT INTO suggestions (line) VALUES ('# a@example.com = Alma Ana\n');
+        """
+    )
+    conn.close()
+
+    db = SqliteDatabase(tmp_path / "database.sqlite")
+    assert db.read_all_lines() == ["a@example.com = Alma Anna\n", "# a@example.com = Alma Ana\n"]
+    db.db_append("b@example.com = Béka Béla")
+    db.flush()
+    assert db.read_all_lines()[-1] == "b@example.com = Béka Béla\n"
+    db.close()
+
+
+def test_sqlite_sees_other_connections_changes(tmp_path):
+    db = SqliteDatabase(tmp_path / "database.sqlite")
+    other = SqliteDatabase(tmp_path / "database.sqlite")
+    assert db.read_email_name_database() == {}
+
+    other.db_append("c@example.com = Cica Cili")
+    assert db.read_email_name_database() == {}  # not flushed yet
+    other.flush()
+    assert db.read_email_name_database() == {"c@example.com": "Cica Cili"}
+
+
+def test_name_typo_case_sqlite(tmp_path):
+    base_dir = Path("tests/data/name_typo")
+    db = SqliteDatabase(tmp_path / "database.sqlite")
+
+    assert run_program(base_dir / "input", tmp_path, "kozep", db) is None  # first run writes the suggestions
+    output_path = run_program(base_dir / "input", tmp_path, "kozep", db)
+    assert output_path is not None
+    assert db.read_email_name_database() == {"gorbe.tamas89@gmail.com": "Görbe Tamás"}
+    os.remove(output_path)
+
+
+def test_returned_pairs_do_not_change(tmp_path):
+    for db in [Database(tmp_path / "database.ini"), SqliteDatabase(tmp_path / "database.sqlite")]:
+        db.db_append("a@example.com = Alma Anna")
+        pairs, index = db.read_email_name_database(), db.read_name_email_index()
+
+        db.db_append("a@example.com = Alma Ágnes")
+        db.db_append("b@example.com = Béka Béla")
+        assert pairs == {"a@example.com": "Alma Anna"}
+        assert index == {"Alma Anna": {"a@example.com"}}
+        assert db.read_email_name_database() == {"a@example.com": "Alma Ágnes", "b@example.com": "Béka Béla"}
+        with pytest.raises(TypeError):
+            pairs["c@example.com"] = "Cica Cili"  # type: ignore[index]
+
+
+@pytest.mark.filterwarnings("ignore:Conditional Formatting extension is not supported:UserWarning")
+@pytest.mark.parametrize("engine", ["ini", "sqlite"])
+def test_db_import_and_export_command(tmp_path, monkeypatch, engine):
+    monkeypatch.setattr(database_module, "EMAILS_DB_FILE", tmp_path / "database.ini")
+    monkeypatch.setattr(database_module, "SQLITE_DB_FILE", tmp_path / "database.sqlite")
+    (tmp_path / "import.ini").write_text("".join(INI_LINES), encoding="utf-8")
+    args = ["tests/data/ok/input", "--out", str(tmp_path), "--no-cache", "--db-engine", engine]
+    args += ["--db-import", str(tmp_path / "import.ini"), "--db-export", str(tmp_path / "export.ini")]
+    monkeypatch.setattr(sys, "argv", ["jelenlet", *args])
+
+    main()
+
+    assert (tmp_path / "export.ini").read_text(encoding="utf-8") == "".join(INI_LINES)
+
+
+def test_failed_atomic_write_keeps_the_file(tmp_path):
+    path = tmp_path / "database.ini"
+    path.write_text("a@example.com = Alma Anna\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        with atomic_write(path, mode="w") as f:
+            f.write("half")
+            raise ValueError("interrupted")
+    assert path.read_text(encoding="utf-8") == "a@example.com = Alma Anna\n"
+    assert list(tmp_path.iterdir()) == [path]  # no temp file left
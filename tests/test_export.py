@@ -0,0 +1,38 @@
+import numpy as np
+import openpyxl
+import pandas as pd
+from pathlib import Path
+
+from jelenlet import cli as cli_module
+from jelenlet import process as process_module
+from jelenlet.database import Database
+from jelenlet.excel_export import to_excel
+
+
+def test_streaming_export_keeps_layout(tmp_path):
+    df = pd.DataFrame({"Email": ["a@example.com", "b@example.com"], "Név": ["Alma Anna", float("nan")], "Össz.": [1, 12]})
+    df["2025.12.01"] = np.array([1, 0], dtype=np.int8)
+    to_excel(tmp_path / "summary.xlsx", df)
+
+    sheet = openpyxl.load_workbook(tmp_path / "summary.xlsx").active
+    assert list(sheet.values) == [
+        ("Email", "Név", "Össz.", "2025.12.01"),
+        ("a@example.com", "Alma Anna", 1, "X"),
+        ("b@example.com", None, 12, "_"),
+    ]
+    assert sheet.freeze_panes == "D2"
+    assert [round(sheet.column_dimensions[c].width) for c in "ABCD"] == [14, 10, 6, 11]
+
+
+def test_machine_readable_formats(tmp_path):
+    df, output_file = process_module.process(Path("tests/data/ok/input"), Database(tmp_path / "db.ini"), "kozep", tmp_path)
+    expected = df.reset_index()
+    parquet_file = cli_module.save_report(df, output_file, ["parquet", "csv", "json"])
+
+    parquet_df = pd.read_parquet(parquet_file)
+    pd.testing.assert_frame_equal(expected, parquet_df)
+    assert (parquet_df.dtypes.iloc[3:] == np.int8).all()
+    csv_df = pd.read_csv(parquet_file.with_suffix(".csv"))
+    pd.testing.assert_frame_equal(expected, csv_df, check_dtype=False)
+    json_df = pd.read_json(parquet_file.with_suffix(".json"), orient="records", convert_dates=False)
+    pd.testing.assert_frame_equal(expected, json_df, check_dtype=False)
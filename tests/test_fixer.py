@@ -0,0 +1,52 @@
+import pytest
+
+from jelenlet.database import Database
+from jelenlet.errors import ReportError
+from jelenlet.fixer import fix_email_issues, fix_name_issues, fixed_name_emails, raise_if_issues
+
+
+def test_name_and_email_issues_in_one_run(tmp_path):
+    db = Database(tmp_path / "database.ini")
+    email_names = {"a@example.com": {"Alma Anna": 2, "Alma Ana": 1}, "b@gmail.com": {"Béka Béla": 2}, "b@gmial.com": {"Béka Béla": 1}}
+
+    email_name, name_issues = fix_name_issues(email_names, db)
+    assert email_name["a@example.com"] == "Alma Anna"  # the suggestion is used for the email checks
+    _, _, email_issues = fix_email_issues(fixed_name_emails(email_names, email_name), email_name, db)
+    with pytest.raises(ReportError):
+        raise_if_issues(name_issues, email_issues)
+    db.flush()
+
+    assert [i.email for i in name_issues] == ["a@example.com"]
+    assert [i.name for i in email_issues] == ["Béka Béla"]
+    assert Database(tmp_path / "database.ini").read_email_name_database() == {
+        "a@example.com": "Alma Anna",
+        "b@gmail.com": "Béka Béla",
+    }
+
+
+def test_email_checks_use_the_fixed_names(tmp_path):
+    db = Database(tmp_path / "database.ini")
+    email_names = {"x@a.hu": {"Kiss Anna": 2, "kiss anna": 1}, "y@b.hu": {"kiss anna": 1}}
+
+    email_name, name_issues = fix_name_issues(email_names, db)
+    assert email_name == {"x@a.hu": "Kiss Anna", "y@b.hu": "kiss anna"}
+    name_emails = fixed_name_emails(email_names, email_name)
+    assert name_emails == {"Kiss Anna": {"x@a.hu": 3}, "kiss anna": {"y@b.hu": 1}}
+    _, _, email_issues = fix_email_issues(name_emails, email_name, db)
+
+    assert [i.email for i in name_issues] == ["x@a.hu"]
+    assert email_issues == []  # no "kiss anna" issue suggesting x@a.hu, that would undo the name fix
+
+
+def test_email_checks_skip_the_names_without_suggestion(tmp_path):
+    db = Database(tmp_path / "database.ini")
+    email_names = {"kiss.a@gmail.com": {"Kiss Anna": 1, "Nagy Petra": 1}, "kiss.a@gmial.com": {"Kiss Anna": 1}}
+
+    email_name, name_issues = fix_name_issues(email_names, db)
+    assert [i.suggestion for i in name_issues] == [None]
+    unresolved = {i.email for i in name_issues if i.suggestion is None}
+    _, _, email_issues = fix_email_issues(fixed_name_emails(email_names, email_name, unresolved), email_name, db)
+    db.flush()
+
+    assert email_issues == []  # a gmail typo fix would write an active "kiss.a@gmail.com = Kiss Anna" line
+    assert Database(tmp_path / "database.ini").read_email_name_database() == {}
@@ -0,0 +1,60 @@
+import shutil
+import pandas as pd
+from pathlib import Path
+
+from jelenlet import incremental as incremental_module
+from jelenlet import process as process_module
+from jelenlet.database import Database
+from jelenlet.cache import ParseCache
+from jelenlet.incremental import load_state, process_incremental, state_file
+from jelenlet.process import process
+
+
+def test_incremental_matches_full_rebuild(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental_module, "INCREMENTAL_STATE_DIR", tmp_path / "state")
+    input_files = sorted(Path("tests/data/ok/input").glob("*.xlsx"))
+    folder = tmp_path / "input"
+    folder.mkdir()
+    db = Database(tmp_path / "database.ini")
+    cache = ParseCache(tmp_path / "cache")  # the parsed sheets of the previous runs
+    for f in input_files[:2]:
+        shutil.copy(f, folder)
+    process_incremental(folder, db, "kozep", tmp_path, cache=cache)
+    assert state_file(folder, "kozep").exists()
+    assert sorted(f.name for f in folder.iterdir()) == [f.name for f in input_files[:2]]  # nothing added to the input folder
+
+    # the new sheet lands: only that one should be parsed
+    shutil.copy(input_files[2], folder)
+    parsed = []
+    read_xlsx = process_module.read_xlsx
+    monkeypatch.setattr(process_module, "read_xlsx", lambda f: parsed.append(f) or read_xlsx(f))
+    incremental_df, _ = process_incremental(folder, db, "kozep", tmp_path, cache=cache)
+    assert [Path(f).name for f in parsed] == [input_files[2].name]
+
+    full_df, _ = process(folder, db, "kozep", tmp_path)
+    pd.testing.assert_frame_equal(full_df, incremental_df)
+
+    # nothing changed: nothing to parse, same result
+    parsed.clear()
+    unchanged_df, _ = process_incremental(folder, db, "kozep", tmp_path, cache=cache)
+    assert parsed == []
+    pd.testing.assert_frame_equal(full_df, unchanged_df)
+
+
+def test_incremental_state_keeps_no_dataframes(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental_module, "INCREMENTAL_STATE_DIR", tmp_path / "state")
+    folder = tmp_path / "input"
+    shutil.copytree("tests/data/ok/input", folder)
+    db = Database(tmp_path / "database.ini")
+    cache = ParseCache(tmp_path / "cache")
+    full_df, _ = process_incremental(folder, db, "kozep", tmp_path, cache=cache)
+
+    state = load_state(state_file(folder, "kozep"))
+    assert state.files and all(f.df is None for f in state.files.values())
+
+    # a new process: the sheets come from the parse cache, not parsed again
+    parsed = []
+    monkeypatch.setattr(process_module, "read_xlsx", lambda f: parsed.append(f))
+    again_df, _ = process_incremental(folder, db, "kozep", tmp_path, cache=cache)
+    assert parsed == []
+    pd.testing.assert_frame_equal(full_df, again_df)
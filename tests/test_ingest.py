@@ -0,0 +1,70 @@
+import openpyxl
+import pandas as pd
+from pathlib import Path
+
+from jelenlet import process as process_module
+from jelenlet.cache import ParseCache
+from jelenlet.process import EMAIL, JOSSZ, NAME, read_dataframes, read_xlsx_columns
+
+
+def test_parallel_read_matches_serial():
+    input_dir = Path("tests/data/name_typo/input")
+
+    serial_dfs, serial_files = read_dataframes(input_dir, "kozep", {}, workers=1)
+    parallel_dfs, parallel_files = read_dataframes(input_dir, "kozep", {}, workers=2)
+
+    assert serial_files == parallel_files
+    for serial_df, parallel_df in zip(serial_dfs, parallel_dfs):
+        pd.testing.assert_frame_equal(serial_df, parallel_df)
+
+
+def test_parse_cache_warm_run_skips_parsing(tmp_path, monkeypatch):
+    input_dir = Path("tests/data/name_typo/input")
+    cache = ParseCache(tmp_path)
+
+    cold_dfs, _ = read_dataframes(input_dir, "kozep", {}, cache=cache)
+
+    def fail(file_name):
+        raise AssertionError(f"{file_name} was parsed despite the warm cache")
+
+    monkeypatch.setattr(process_module, "read_xlsx", fail)
+    warm_dfs, _ = read_dataframes(input_dir, "kozep", {}, cache=cache)
+
+    for cold_df, warm_df in zip(cold_dfs, warm_dfs):
+        pd.testing.assert_frame_equal(cold_df, warm_df)
+
+
+def test_sheet_the_cache_cannot_store_is_still_read(tmp_path, capsys):
+    folder = tmp_path / "input"
+    folder.mkdir()
+    wb = openpyxl.Workbook()
+    wb.active.append(["Időbélyeg", "E-mail-cím", "Teljes név", "Jössz próbára?"])
+    wb.active.append(["2025.12.01 10:00:00", "a@x.hu", "Alma Anna", "Igen"])
+    wb.active.append(["2025.12.01 10:01:00", "b@x.hu", "Béka Béla", 1])  # mixed types: parquet can't store the column
+    wb.save(folder / "Középhaladós próba - 2025. 12. 01. (válaszok).xlsx")
+    cache = ParseCache(tmp_path / "cache")
+
+    dfs, _ = read_dataframes(folder, "kozep", {}, cache=cache)
+
+    assert len(dfs[0]) == 2
+    assert "[WARNING] Not caching" in capsys.readouterr().out
+    assert not list(Path(tmp_path / "cache").iterdir())  # no entry, no temp file left
+
+
+def test_streamed_columns_match_read_excel(tmp_path):
+    path = tmp_path / "Középhaladós próba - 2025. 12. 01. (válaszok).xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Időbélyeg", "Email Address", "Name", "Jössz próbára?"])  # header aliases
+    ws.append(["2025.12.01 10:00:00", "a@x.hu", "Alma Anna", "Igen"])
+    ws.append(["2025.12.01 10:01:00", "N/A", "NA", "Nem"])  # read as NaN
+    ws.append([])  # empty row in the middle: kept
+    ws.append(["2025.12.01 10:02:00", " b@x.hu ", None, "n/a"])
+    for row in range(6, 10):  # blank, but formatted tail: dropped
+        ws.cell(row, 2).number_format = "@"
+    ws.cell(9, 3).value = ""
+    wb.save(path)
+
+    expected = pd.read_excel(path).rename(columns={"Email Address": EMAIL, "Name": NAME})[[EMAIL, NAME, JOSSZ]]
+    assert len(expected) == 4
+    pd.testing.assert_frame_equal(read_xlsx_columns(str(path)), expected)
@@ -0,0 +1,22 @@
+from pathlib import Path
+
+import pytest
+
+from jelenlet.database import Database
+from jelenlet.jobs import JobRunner
+from jelenlet.process import ReportPipeline
+
+
+@pytest.mark.filterwarnings("ignore:Conditional Formatting extension is not supported:UserWarning")
+def test_job_reports_progress_of_every_stage(tmp_path):
+    runner = JobRunner(max_jobs=1)
+    pipeline = ReportPipeline(Path("tests/data/ok/input"), "kozep")
+    job = runner.submit(lambda job: pipeline.run(Database(tmp_path / "database.ini"), tmp_path, job.report)[0])
+    df = job.result()
+    runner.shutdown()
+
+    assert len(df) > 0
+    events = job.events
+    assert [(e.done, e.total) for e in events if e.stage == "ingest"] == [(0, 3), (1, 3), (2, 3), (3, 3)]
+    assert list(dict.fromkeys(e.stage for e in events)) == ["ingest", "journal", "fix", "aggregate"]
+    assert job.latest == events[-1]
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+import pytest
+
+from jelenlet.database import Database
+from jelenlet.metrics import collect_metrics, span
+from jelenlet.process import process
+
+
+@pytest.mark.filterwarnings("ignore:Conditional Formatting extension is not supported:UserWarning")
+def test_metrics_have_a_span_per_stage_and_file(tmp_path):
+    with collect_metrics(peak_memory=True) as metrics:
+        df, _ = process(Path("tests/data/ok/input"), Database(tmp_path / "database.ini"), "kozep", tmp_path)
+
+    spans = {s.name: s for s in metrics.spans}
+    assert [s.name for s in metrics.spans if s.depth == 0] == ["ingest", "journal", "fix", "aggregate"]
+    assert len([name for name in spans if name.startswith("parse ")]) == 3
+    assert spans["ingest"].rows == sum(s.rows for s in metrics.spans if s.name.startswith("parse "))
+    assert spans["aggregate"].rows == len(df)
+    assert all(s.peak_mb is not None and s.seconds >= 0 for s in metrics.spans)
+
+    with span("not collected") as s:
+        s.rows = 1
+    assert "not collected" not in [s.name for s in metrics.spans]
@@ -0,0 +1,50 @@
+from jelenlet.fixer.allowed_names import load_index
+from jelenlet.fixer.name_fixer import detect_issue, read_allowed_names
+from jelenlet.fixer.name_index import NameIndex, name_key
+
+
+def test_fuzzy_suggestions():
+    issue = detect_issue("g@example.com", {"Gorbe Tamas": 1, "Tamás Görbe": 1})
+    assert issue and issue.suggestion == "Görbe Tamás"
+
+    index = NameIndex(["Görbe Tamás", "Kiss Anna"])
+    issue = detect_issue("g@example.com", {"Grobe Tamas": 1, "Tamas Gorbe": 1}, index)
+    assert issue and issue.suggestion == "Görbe Tamás"
+
+    issue = detect_issue("g@example.com", {"Gorbe Tamas": 1, "Kiss Tamas": 1}, index)
+    assert issue and issue.suggestion is None
+
+
+def test_different_given_names_are_not_merged():
+    for names in [{"Nagy Péter": 1, "Nagy Petra": 1}, {"Kiss Anna": 1, "Kiss Ada": 1}]:
+        issue = detect_issue("n@example.com", names, NameIndex([]))
+        assert issue and issue.suggestion is None
+
+    issue = detect_issue("n@example.com", {"Nagy Péter": 1, "Nagy Peter": 1}, NameIndex([]))  # accents only
+    assert issue and issue.suggestion == "Nagy Péter"
+
+
+def test_name_index_lookup_compares_few_names():
+    given_names = sorted(read_allowed_names())
+    surnames = ["Görbe", "Kovács", "Szabó", "Nagy", "Tóth", "Horváth", "Kiss", "Molnár", "Varga", "Farkas"]
+    known = [f"{s} {g}" for s in surnames for g in given_names[::20]]
+    index = NameIndex(known)
+    queries = [n[1:] + "x" for n in known[:500]]  # 2 edits away
+
+    assert sum(index.lookup(q) is not None for q in queries) > len(queries) / 2
+    # edit_distance runs on the candidates only, not on every known name
+    compared = [len(index._index.candidates(name_key(q))) for q in queries]
+    assert max(compared) < len(known) / 50
+
+
+def test_allowed_names_index_rebuilt_when_csv_changes(tmp_path):
+    csv_file, index_file = tmp_path / "names.csv", tmp_path / "names.index.pickle"
+    csv_file.write_text("﻿nev;nem\nTamás;1\nAnna;2\n", encoding="utf-8")
+
+    index = load_index(csv_file, index_file)
+    assert index.names == {"Tamás", "Anna"}
+    assert index.given_names.restore_accents("TAMAS") == "Tamás"
+    assert load_index(csv_file, index_file).csv_sha256 == index.csv_sha256  # loaded from index_file
+
+    csv_file.write_text("﻿nev;nem\nTamás;1\nAnna;2\nÉva;2\n", encoding="utf-8")
+    assert "Éva" in load_index(csv_file, index_file).names
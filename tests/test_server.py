@@ -0,0 +1,79 @@
+import asyncio
+import json
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from jelenlet.server import ReportService
+from jelenlet.synthetic import Rates, generate_season
+
+
+async def post(port: int, target: str, body: bytes, content_type: str) -> tuple[int, bytes]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    head = f"POST {target} HTTP/1.1\r\nHost: localhost\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n"
+    writer.write(head.encode("latin-1") + body)
+    response = await reader.read()
+    writer.close()
+    status_line, _, rest = response.partition(b"\r\n")
+    return int(status_line.split()[1]), rest.partition(b"\r\n\r\n")[2]
+
+
+def multipart(level: str, files: list[Path]) -> tuple[bytes, str]:
+    boundary = "jelenlet-test-boundary"
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="level"\r\n\r\n{level}\r\n'.encode()]
+    for f in files:
+        head = f'--{boundary}\r\nContent-Disposition: form-data; name="files"; filename="{f.name}"\r\n'
+        parts.append(f"{head}Content-Type: application/octet-stream\r\n\r\n".encode() + f.read_bytes() + b"\r\n")
+    return b"".join(parts) + f"--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+
+@pytest.mark.filterwarnings("ignore:Conditional Formatting extension is not supported:UserWarning")
+def test_post_reports_returns_xlsx_or_issues(tmp_path):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for f in Path("tests/data/ok/input").glob("*.xlsx"):
+            zf.write(f, f"season/{f.name}")
+    typos = generate_season(tmp_path / "typos", members=30, rehearsals=3, rates=Rates(name_typos=0.3))
+
+    async def run():
+        service = ReportService(tmp_path / "db", max_jobs=2)
+        server = await service.serve("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            ok, no_files, bad = await asyncio.gather(
+                post(port, "/reports?level=kozep", buffer.getvalue(), "application/zip"),
+                post(port, "/reports", *multipart("halado", typos)),  # no halado sheets: the level of the form counts
+                post(port, "/reports?level=nincs", buffer.getvalue(), "application/zip"),
+            )
+            issues = await post(port, "/reports", *multipart("kozep", typos))
+        finally:
+            server.close()
+            service.close()
+        return ok, no_files, bad, issues
+
+    ok, no_files, bad, issues = asyncio.run(run())
+    assert ok[0] == 200 and ok[1][:2] == b"PK"
+    assert no_files[0] == 422
+    assert bad[0] == 400
+    assert issues[0] == 409
+    assert json.loads(issues[1])["name_issues"][0]["email"]
+
+
+def test_post_reports_with_a_corrupt_sheet(tmp_path):
+    corrupt = tmp_path / "Középhaladós próba - 2025. 12. 01. (válaszok).xlsx"
+    corrupt.write_bytes(b"not an xlsx")
+
+    async def run():
+        service = ReportService(tmp_path / "db", max_jobs=1)
+        server = await service.serve("127.0.0.1", 0)
+        try:
+            return await post(server.sockets[0].getsockname()[1], "/reports", *multipart("kozep", [corrupt]))
+        finally:
+            server.close()
+            service.close()
+
+    status, body = asyncio.run(run())
+    assert status == 422
+    assert "BadZipFile" in json.loads(body)["error"]
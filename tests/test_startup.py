@@ -0,0 +1,23 @@
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = {"pandas", "numpy", "openpyxl", "xlsxwriter", "jelenlet.process", "jelenlet.fixer"}
+
+
+def imported_modules(code: str) -> set[str]:
+    """Modules in sys.modules after running `code` in a new interpreter."""
+    code += "\nimport json, sys; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+def test_importing_the_cli_does_not_import_the_report_pipeline():
+    assert not HEAVY_MODULES & imported_modules("import jelenlet.cli")
+
+
+def test_help_does_not_import_the_report_pipeline():
+    modules = imported_modules(
+        "import sys; sys.argv = ['jelenlet', '--help']\nfrom jelenlet.cli import main\ntry: main()\nexcept SystemExit: pass"
+    )
+    assert not HEAVY_MODULES & modules
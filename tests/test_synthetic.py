@@ -0,0 +1,12 @@
+from pathlib import Path
+
+from jelenlet.database import Database
+from jelenlet.process import process
+from jelenlet.synthetic import Rates, generate_season
+
+
+def test_synthetic_season_without_typos_builds_a_report(tmp_path):
+    generate_season(tmp_path / "xlsx", members=30, rehearsals=4, rates=Rates(nem_answers=0.0), attendance=1.0)
+    df, _ = process(tmp_path / "xlsx", Database(tmp_path / "db.ini", delete_db=True), "kozep", Path())
+    assert len(df) == 30
+    assert (df["Össz."] == 4).all()
@@ -0,0 +1,34 @@
+import shutil
+
+from jelenlet import incremental as incremental_module
+from jelenlet.cli import save_report
+from jelenlet.database import Database
+from jelenlet.synthetic import generate_season
+from jelenlet.watch import FolderWatcher
+
+
+def test_watcher_rebuilds_after_new_sheet_settled(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental_module, "INCREMENTAL_STATE_DIR", tmp_path / "state")
+    source, folder, out = tmp_path / "all", tmp_path / "watched", tmp_path / "out"
+    files = generate_season(source, members=20, rehearsals=3)
+    folder.mkdir()
+    out.mkdir()
+    for f in files[:2]:
+        shutil.copy(f, folder)
+    watcher = FolderWatcher(folder, out, "kozep", Database(tmp_path / "db.ini"), save_report, settle=1.0)
+
+    assert not watcher.poll(now=0.0)  # first seen
+    assert not watcher.poll(now=0.5)  # not settled yet
+    assert watcher.poll(now=1.5)
+    assert watcher.report and watcher.report.exists()
+    assert not watcher.poll(now=3.0)  # nothing changed
+
+    # half copied sheet: read after it settled, fails, waits for the next change
+    (folder / files[2].name).write_bytes(files[2].read_bytes()[:100])
+    watcher.poll(now=4.0)
+    assert watcher.poll(now=5.5)
+    assert len(watcher.state.files) == 2
+    shutil.copy(files[2], folder)
+    watcher.poll(now=6.0)
+    assert watcher.poll(now=7.5)
+    assert len(watcher.state.files) == 3